@@ -122,11 +122,8 @@ def extract_pdf_text_from_upload(file: UploadFile):
     Extracts text from an uploaded PDF file using PyMuPDF.
     """
     file_bytes = file.file.read()
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text("text")
-    return text
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return "".join(page.get_text("text") for page in doc)
 
 # ---------------- LLM & PDF Generation Functions ----------------
 
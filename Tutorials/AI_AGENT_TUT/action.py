@@ -1,3 +1,13 @@
+from tool_registry import registry
+
+
+# Response times change, but not within a few minutes
+@registry.register(
+    description="Returns the response time of a website",
+    parameters={"url": {"type": "string", "description": "Address of the website"}},
+    ttl=300,
+    timeout=10,
+)
 def get_response_time(url):
     if url == "https://www.google.com":
         return 0.1
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+from openai import AsyncOpenAI
+
+from json_helpers import extract_json_stream
+from prompts import system_prompt
+from tool_executor import ToolExecutor, format_action_responses
+
+
+def make_client(api_key=None, base_url=None, max_connections=100):
+    """
+    Async OpenAI client over one connection pool. Up to `max_connections`
+    requests run at once but only 20 idle connections are kept, as in the
+    RAG app: keeping every connection of a burst alive made the next burst
+    wait on stale ones.
+    """
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=20),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        ),
+    )
+
+
+class Agent:
+    """
+    The Thought / Action / Action_Response loop of the tutorial, as an
+    object that many conversations can run through at once.
+
+    Each `run` call is one conversation with its own messages. All of them
+    share the client's connection pool and the tool executor, and at most
+    `max_concurrency` completion requests are in flight at a time, so
+    hundreds of sessions can run on one event loop without flooding the API.
+
+    Args:
+        actions (dict or ToolRegistry): The tools, see ToolExecutor.
+        client (AsyncOpenAI): Shared client, e.g. from make_client.
+        model (str): Chat model.
+        max_turns (int): The loop stops before this turn, as in the original
+                         script (so at most max_turns - 1 completions).
+        max_concurrency (int): Completion requests in flight across sessions.
+        verbose (bool): Print each turn like the original script.
+    """
+
+    def __init__(
+        self,
+        actions,
+        client,
+        model="gpt-4",
+        system_prompt=system_prompt,
+        max_turns=5,
+        max_concurrency=64,
+        tool_workers=8,
+        tool_timeout=10.0,
+        verbose=False,
+    ):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.max_turns = max_turns
+        self.verbose = verbose
+        self.executor = ToolExecutor(actions, max_workers=tool_workers, default_timeout=tool_timeout)
+        self._requests = asyncio.Semaphore(max_concurrency)
+
+    async def generate(self, messages):
+        async with self._requests:
+            response = await self.client.chat.completions.create(model=self.model, messages=messages)
+        return response.choices[0].message.content
+
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    async def run(self, user_prompt):
+        """
+        Runs one conversation until the model stops asking for actions.
+
+        Returns:
+            str: The model's last response, normally its "Answer: ...".
+        """
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        response = None
+        for turn in range(1, self.max_turns):
+            self._log(f"Loop: {turn}")
+            self._log("----------------------")
+            response = await self.generate(messages)
+            self._log(response)
+            messages.append({"role": "assistant", "content": response})
+
+            calls = [obj for obj in extract_json_stream(response) or [] if "function_name" in obj]
+            if not calls:
+                break
+            for call in calls:
+                self._log(f" -- running {call.get('function_name')} {call.get('function_parms')}")
+            outcomes = await self.executor.arun(calls)
+            function_result_message = format_action_responses(calls, outcomes)
+            messages.append({"role": "user", "content": function_result_message})
+            self._log(function_result_message)
+        return response
+
+    async def close(self):
+        self.executor.close()
+        await self.client.close()
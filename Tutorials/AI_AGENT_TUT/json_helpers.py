@@ -1,6 +1,7 @@
 import re
 import json
-from pydantic import BaseModel, ValidationError
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import get_type_hints
 
 
@@ -44,6 +45,144 @@ def extend_search_new(text, span):
     return text[start:end] 
 
 
+# Characters that change the scanner state, outside and inside JSON strings
+_STRUCTURE = re.compile(r'[{}"]')
+_STRING_END = re.compile(r'["\\]')
+_NON_SPACE = re.compile(r'\S')
+# A '{' followed by '"' or '}', or by nothing yet at the end of the chunk
+_OBJECT_START = re.compile(r'\{\s*(?:["}]|\Z)')
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamScanner:
+    """
+    Finds top-level JSON objects in text that arrives in pieces, such as a
+    streamed LLM response, in a single pass.
+
+    Braces and quotes inside JSON strings (including escaped quotes) are
+    handled, and a '{' only starts an object when the next non-space
+    character is '"' or '}', so braces in surrounding prose are skipped.
+    Each character is looked at once, however the text is split.
+
+    Usage:
+        scanner = JsonStreamScanner()
+        for chunk in stream:
+            for obj in scanner.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._pending = False  # saw '{', waiting for its next character
+        self._in_string = False
+        self._escape = False  # the previous chunk ended with a backslash
+        self._parts = []  # text of the object being read, from earlier chunks
+
+    def feed(self, chunk):
+        """
+        Scans the next piece of text.
+
+        Returns:
+            list: The JSON objects completed within this piece.
+        """
+        objects = []
+        start = 0  # where the current object's text begins in this chunk
+        pos = 0
+        if self._escape:
+            self._escape = False
+            pos = 1
+        length = len(chunk)
+        while pos < length:
+            if not self._depth:
+                match = _OBJECT_START.search(chunk, pos)
+                if match is None:
+                    break
+                start = match.start()
+                self._depth, self._parts = 1, []
+                if match.group()[-1] not in '"}':
+                    self._pending = True  # the next chunk decides
+                    pos = length
+                    break
+                # Fast path: a complete object is decoded in C in one go.
+                # Anything else (unfinished or invalid) goes through the
+                # character scan below.
+                try:
+                    obj, end = _decoder.raw_decode(chunk, start)
+                except (ValueError, RecursionError):
+                    pos = start + 1
+                    continue
+                objects.append(obj)
+                self._depth = 0
+                pos = end
+            elif self._pending:
+                match = _NON_SPACE.search(chunk, pos)
+                if match is None:
+                    break
+                self._pending = False
+                if match.group() not in '"}':
+                    self._depth = 0
+                    pos = match.start()
+                    continue
+                pos = match.start()
+            elif self._in_string:
+                match = _STRING_END.search(chunk, pos)
+                if match is None:
+                    break
+                if match.group() == "\\":
+                    pos = match.end() + 1
+                    if pos > length:
+                        self._escape = True
+                else:
+                    self._in_string = False
+                    pos = match.end()
+            else:
+                match = _STRUCTURE.search(chunk, pos)
+                if match is None:
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == '"':
+                    self._in_string = True
+                elif char == "{":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if not self._depth:
+                        self._parts.append(chunk[start:pos])
+                        try:
+                            objects.append(json.loads("".join(self._parts)))
+                        except json.JSONDecodeError:
+                            pass
+                        self._parts = []
+        if self._depth:
+            self._parts.append(chunk[start:])
+        return objects
+
+
+def iter_json_objects(chunks):
+    """Yields each top-level JSON object as soon as it is complete in `chunks` (an iterable of str)."""
+    scanner = JsonStreamScanner()
+    for chunk in chunks:
+        yield from scanner.feed(chunk)
+
+
+async def aiter_json_objects(chunks):
+    """iter_json_objects for an async iterable, e.g. streamed completion tokens."""
+    scanner = JsonStreamScanner()
+    async for chunk in chunks:
+        for obj in scanner.feed(chunk):
+            yield obj
+
+
+def extract_json_stream(text_response):
+    """
+    Linear-time replacement for extract_json with the same return value:
+    the list of top-level JSON objects in the text, or None.
+    """
+    json_objects = JsonStreamScanner().feed(text_response)
+    return json_objects if json_objects else None
+
+
 def extract_json_old(text_response):
     # This pattern matches a string that starts with '{' and ends with '}'
     pattern = r'\{[^{}]*\}'
@@ -87,12 +226,78 @@ def extend_search(text, span):
 
 def json_to_pydantic(model_class, json_data):
     try:
-        model_instance = model_class(**json_data)
-        return model_instance
+        return model_class.model_validate(json_data)
     except ValidationError as e:
         print("Validation error:", e)
         return None
 
+@lru_cache(maxsize=None)
+def list_adapter(model_class):
+    """The TypeAdapter for list[model_class], built once per model class."""
+    return TypeAdapter(list[model_class])
+
+def _error_records(error, items):
+    """Groups the errors of a list validation by item."""
+    records = {}
+    for detail in error.errors(include_url=False):
+        index, *loc = detail["loc"]
+        record = records.setdefault(index, {"index": index, "data": items[index], "errors": []})
+        record["errors"].append({"loc": tuple(loc), "type": detail["type"], "msg": detail["msg"]})
+    return [records[index] for index in sorted(records)]
+
+def validate_json_batch(model_class, json_data):
+    """
+    Validates many objects against a Pydantic model in one call.
+
+    JSON text or bytes are validated straight from the JSON by
+    pydantic-core, without building Python dicts first. Invalid items don't
+    stop the others: they are reported and the rest validated again.
+
+    Args:
+        model_class (BaseModel): The Pydantic model class to validate against.
+        json_data (str, bytes, list or dict): A JSON array of objects or a
+                                              single object, as JSON text or
+                                              already parsed.
+
+    Returns:
+        list: Model instances of the valid items, in input order.
+        list: One record per invalid item, {"index": position in the input,
+              "data": the item, "errors": [{"loc", "type", "msg"}]}. If the
+              input is not JSON or neither an array nor an object, a single
+              record with index None.
+    """
+    adapter = list_adapter(model_class)
+    if isinstance(json_data, (str, bytes, bytearray)):
+        try:
+            return adapter.validate_json(json_data), []
+        except ValidationError:
+            pass
+        # Some items are invalid, or it is not an array: sort it out on
+        # the parsed data.
+        try:
+            json_data = json.loads(json_data)
+        except json.JSONDecodeError as e:
+            error = {"loc": (), "type": "json_invalid", "msg": str(e)}
+            return [], [{"index": None, "data": json_data, "errors": [error]}]
+        if not isinstance(json_data, (list, dict)):
+            error = {"loc": (), "type": "list_type", "msg": "Input should be a JSON array or object"}
+            return [], [{"index": None, "data": json_data, "errors": [error]}]
+
+    items = [json_data] if isinstance(json_data, dict) else json_data
+    if not isinstance(items, list):
+        raise ValueError("Invalid JSON data type. Expected dict or list.")
+    try:
+        return adapter.validate_python(items), []
+    except ValidationError as e:
+        return _retry_valid(adapter, items, e)
+
+def _retry_valid(adapter, items, error):
+    # pydantic reports every failing item, so the rest are known to be valid.
+    records = _error_records(error, items)
+    failed = {record["index"] for record in records}
+    valid = adapter.validate_python([item for i, item in enumerate(items) if i not in failed])
+    return valid, records
+
 def validate_json_with_model(model_class, json_data):
     """
     Validates JSON data against a specified Pydantic model.
@@ -106,24 +311,17 @@ def validate_json_with_model(model_class, json_data):
         list: A list of validated JSON objects that match the Pydantic model.
         list: A list of errors for JSON objects that do not match the model.
     """
-    validated_data = []
-    validation_errors = []
-
-    if isinstance(json_data, list):
-        for item in json_data:
-            try:
-                model_instance = model_class(**item)
-                validated_data.append(model_instance.dict())
-            except ValidationError as e:
-                validation_errors.append({"error": str(e), "data": item})
-    elif isinstance(json_data, dict):
-        try:
-            model_instance = model_class(**json_data)
-            validated_data.append(model_instance.dict())
-        except ValidationError as e:
-            validation_errors.append({"error": str(e), "data": json_data})
-    else:
+    if not isinstance(json_data, (list, dict)):
         raise ValueError("Invalid JSON data type. Expected dict or list.")
+    models, records = validate_json_batch(model_class, json_data)
+    validated_data = [model.model_dump() for model in models]
+    validation_errors = []
+    for record in records:
+        messages = [
+            f"{'.'.join(map(str, e['loc']))}: {e['msg']}" if e["loc"] else e["msg"]
+            for e in record["errors"]
+        ]
+        validation_errors.append({"error": "; ".join(messages), "data": record["data"]})
 
     return validated_data, validation_errors
 
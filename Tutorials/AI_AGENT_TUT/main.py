@@ -1,63 +1,37 @@
-from openai import OpenAI
+import asyncio
 import os
 from dotenv import load_dotenv
-from action import get_response_time
-from prompts import system_prompt
-from json_helpers import extract_json
+from action import registry
+from agent import Agent, make_client
+from tool_registry import ResultCache
 
 # Load environment variables
 load_dotenv()
 
-# Create an instance of the OpenAI class
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+#Available actions are the tools registered in action.py. Their cached
+#results are also kept on disk when TOOL_CACHE_DIR is set, so repeated
+#runs don't call them again.
 
-
-def generate_text_with_conversation(messages, model = "gpt-3.5-turbo"):
-    response = openai_client.chat.completions.create(
-        model=model,
-        messages=messages
-        )
-    return response.choices[0].message.content
-
-#Available actions are:
-
-available_actions = {
-    "get_response_time": get_response_time
-}
+if os.getenv("TOOL_CACHE_DIR"):
+    registry.cache = ResultCache(directory=os.getenv("TOOL_CACHE_DIR"))
 
 user_prompt = "what is the response time for netflix.com ?"
 
 
-messages = [
-    {"role": "system", "content": system_prompt},
-    {"role": "user", "content": user_prompt},
-]
-turn_count = 1
-max_turns = 5
-
-
-while turn_count < max_turns:
-    print (f"Loop: {turn_count}")
-    print("----------------------")
-    turn_count += 1
-
-    response = generate_text_with_conversation(messages, model="gpt-4")
-
-    print(response)
+async def main():
+    # One pooled client and agent can serve many conversations at once;
+    # this script runs a single one.
+    agent = Agent(
+        registry,
+        make_client(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL")),
+        model="gpt-4",
+        verbose=True,
+    )
+    try:
+        await agent.run(user_prompt)
+    finally:
+        await agent.close()
 
-    json_function = extract_json(response)
 
-    if json_function:
-            function_name = json_function[0]['function_name']
-            function_parms = json_function[0]['function_parms']
-            if function_name not in available_actions:
-                raise Exception(f"Unknown action: {function_name}: {function_parms}")
-            print(f" -- running {function_name} {function_parms}")
-            action_function = available_actions[function_name]
-            #call the function
-            result = action_function(**function_parms)
-            function_result_message = f"Action_Response: {result}"
-            messages.append({"role": "user", "content": function_result_message})
-            print(function_result_message)
-    else:
-         break
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,7 +6,11 @@ At the end of the loop you output an Answer.
 
 Use Thought to understand the question you have been asked.
 Use Action to run one of the actions available to you - then return PAUSE.
-Action_Response will be the result of running those actions.
+If you need several independent actions (e.g. the response times of
+several websites), output all of their JSON objects in one Action; they
+run at the same time.
+Action_Response will be the result of running those actions, one line per
+action when there are several.
 
 Your available actions are:
 
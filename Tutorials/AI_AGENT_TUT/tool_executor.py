@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from tool_registry import ToolRegistry
+
+
+class ToolExecutor:
+    """
+    Runs all the actions the model asked for in one turn at the same time.
+
+    Async actions run on the event loop, plain functions on a thread pool.
+    Each call gets `timeouts[function_name]` seconds (or `default_timeout`);
+    a call that fails or times out is reported as an error instead of
+    stopping the others. A timed-out plain function keeps its thread until
+    it returns, as threads can't be cancelled.
+
+    `actions` is a dict of functions or a ToolRegistry. With a registry,
+    arguments are checked against each tool's schema, tools may set their
+    own timeout, and cached results of cacheable tools are returned
+    without running them. Cache files are read and written on the default
+    thread pool, not on the event loop or the tool threads.
+    """
+
+    def __init__(self, actions, max_workers=8, default_timeout=10.0, timeouts=None):
+        self.actions = actions
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    async def _call(self, call):
+        name = call.get("function_name")
+        parms = call.get("function_parms") or {}
+        registry = self.actions if isinstance(self.actions, ToolRegistry) else None
+        tool = registry.get(name) if registry else None
+        action = tool.func if tool else self.actions.get(name)
+        if action is None:
+            return {"error": f"Unknown action: {name}"}
+        timeout = self.timeouts.get(name) or (tool and tool.timeout) or self.default_timeout
+        try:
+            if tool:
+                parms = tool.canonical_args(parms)
+                # Only memory is checked on the loop; cache files are read on a thread.
+                hit, result = registry.lookup(tool, parms, memory_only=True)
+                if hit is None:
+                    hit, result = await asyncio.to_thread(registry.lookup, tool, parms)
+                if hit:
+                    return {"result": result, "cached": True}
+            if inspect.iscoroutinefunction(action):
+                result = await asyncio.wait_for(action(**parms), timeout)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self.pool, lambda: action(**parms)), timeout
+                )
+        except asyncio.TimeoutError:
+            return {"error": f"{name} timed out after {timeout} seconds"}
+        except Exception as e:
+            return {"error": f"{name} failed: {e}"}
+        if tool and tool.cacheable:
+            if registry.cache.directory:
+                await asyncio.to_thread(registry.store, tool, parms, result)
+            else:
+                registry.store(tool, parms, result)
+        return {"result": result}
+
+    async def arun(self, calls):
+        """
+        Runs the calls concurrently.
+
+        Args:
+            calls (list[dict]): {"function_name": ..., "function_parms": {...}}
+                                objects as extracted from the response.
+
+        Returns:
+            list[dict]: {"result": ...} or {"error": ...} per call, in order.
+        """
+        # Identical calls in one turn run once.
+        keys = [
+            json.dumps([call.get("function_name"), call.get("function_parms")], sort_keys=True, default=str)
+            for call in calls
+        ]
+        tasks = {}
+        for key, call in zip(keys, calls):
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(self._call(call))
+        await asyncio.gather(*tasks.values())
+        return [tasks[key].result() for key in keys]
+
+    def run(self, calls):
+        """Blocking version of arun, for code without an event loop."""
+        return asyncio.run(self.arun(calls))
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+def _value(outcome):
+    return outcome["result"] if "result" in outcome else f"Error: {outcome['error']}"
+
+
+def format_action_responses(calls, outcomes):
+    """
+    One user message with every result. A single call keeps the
+    "Action_Response: <result>" form of the prompt; several are listed one
+    per line with the call they answer.
+    """
+    if len(calls) == 1:
+        return f"Action_Response: {_value(outcomes[0])}"
+    lines = ["Action_Response:"]
+    for call, outcome in zip(calls, outcomes):
+        parms = json.dumps(call.get("function_parms") or {})
+        lines.append(f"- {call.get('function_name')} {parms}: {_value(outcome)}")
+    return "\n".join(lines)
@@ -0,0 +1,268 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+JSON_TYPES = {
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+def _expired(entry):
+    return entry[0] is not None and entry[0] < time.time()
+
+
+class ResultCache:
+    """
+    Memoized tool results: an in-memory LRU of `max_entries`, plus one JSON
+    file per result in `directory` when given, so results survive restarts
+    and are shared by processes. Results must be JSON serializable to be
+    written to disk.
+
+    Expired results are deleted when they are read. The directory is kept
+    to `max_files` results: past that, the least recently used files (by
+    modification time, refreshed when a result is read from disk) are
+    deleted, those of results held in memory last.
+    """
+
+    def __init__(self, max_entries=1024, directory=None, max_files=10_000):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_files = max_files
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+        self._files = 0  # files in directory, as last counted plus those written since
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._files = len(self._list_files())
+
+    def get(self, key, memory_only=False):
+        """
+        Returns (True, value) for a fresh entry, else (False, None).
+
+        With `memory_only` the disk is left alone, for callers on an event
+        loop: a result not in memory gives (None, None) when there is a
+        directory, meaning get(key) may still find it there.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if _expired(entry):
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+        if entry is None:
+            if memory_only and self.directory:
+                return None, None
+            entry = self._read(key)
+            if entry is not None and _expired(entry):
+                self._forget(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._remember(key, entry)
+            self._touch(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key, value, ttl=None):
+        entry = (None if ttl is None else time.time() + ttl, value)
+        self._remember(key, entry)
+        if self.directory:
+            try:
+                payload = json.dumps({"expires_at": entry[0], "value": value})
+            except TypeError:
+                return  # not JSON serializable, kept in memory only
+            path = self._path(key)
+            existed = os.path.exists(path)
+            with open(path + ".tmp", "w") as f:
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+            if not existed:
+                with self._lock:
+                    self._files += 1
+                    full = self._files > self.max_files
+                if full:
+                    self._prune()
+
+    def _forget(self, key):
+        """Drops an expired entry from memory and disk."""
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _touch(self, key):
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _list_files(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+
+    def _prune(self):
+        """
+        Deletes the least recently used files, down to 90% of max_files.
+        Files of results held in memory go last.
+        """
+        with self._lock:
+            held = {self._path(key) for key in self._entries}
+        files = []
+        for entry in self._list_files():
+            try:
+                files.append((entry.path in held, entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass  # deleted by another process meanwhile
+        files.sort()
+        excess = len(files) - int(self.max_files * 0.9)
+        for _, _, path in files[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._files = len(files) - max(excess, 0)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return data["expires_at"], data["value"]
+
+
+class Tool:
+    """
+    An action the agent can call, with its parameter schema and caching
+    policy.
+
+    Args:
+        func (callable): The function, plain or async.
+        name (str): Name the model uses, defaults to the function name.
+        description (str): What the tool does.
+        parameters (dict): Parameter name -> {"type": JSON type,
+                           "description": ...}. Defaults to the function's
+                           parameters, untyped.
+        pure (bool): Same arguments always give the same result, so results
+                     are cached until evicted.
+        ttl (float): Seconds to cache results of a tool that isn't pure
+                     (e.g. a measurement that stays valid for a while).
+        timeout (float): Seconds a call may take, see ToolExecutor.
+    """
+
+    def __init__(self, func, name=None, description="", parameters=None, pure=False, ttl=None, timeout=None):
+        self.func = func
+        self.name = name or func.__name__
+        self.description = description
+        self.signature = inspect.signature(func)
+        self.parameters = parameters or {name: {} for name in self.signature.parameters}
+        self.pure = pure
+        self.ttl = ttl
+        self.timeout = timeout
+
+    @property
+    def cacheable(self):
+        return self.pure or self.ttl is not None
+
+    def canonical_args(self, parms):
+        """
+        Checks `parms` against the schema and returns them with defaults
+        filled in, so equivalent calls get the same cache key.
+
+        Raises:
+            ValueError: Unknown, missing or mistyped parameters.
+        """
+        unknown = set(parms) - set(self.parameters)
+        if unknown:
+            raise ValueError(f"unknown parameters {sorted(unknown)}")
+        try:
+            bound = self.signature.bind(**parms)
+        except TypeError as e:
+            raise ValueError(str(e)) from None
+        bound.apply_defaults()
+        for name, value in bound.arguments.items():
+            expected = JSON_TYPES.get(self.parameters.get(name, {}).get("type"))
+            if expected and not isinstance(value, expected):
+                raise ValueError(f"{name} should be a {self.parameters[name]['type']}")
+        return dict(bound.arguments)
+
+    def cache_key(self, args):
+        payload = json.dumps([self.name, args], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolRegistry:
+    """
+    The agent's tools by name, with a shared ResultCache. ToolExecutor
+    takes a registry in place of a plain dict of functions and skips
+    calling cacheable tools whose result is cached.
+    """
+
+    def __init__(self, cache=None):
+        self.tools = {}
+        self.cache = cache or ResultCache()
+
+    def register(self, func=None, **options):
+        """
+        Adds a tool; see Tool for the options. Works as a plain call or as a
+        decorator, with or without options:
+
+            @registry.register(description="...", ttl=60)
+            def get_response_time(url): ...
+        """
+        if func is None:
+            return lambda f: self.register(f, **options)
+        tool = Tool(func, **options)
+        self.tools[tool.name] = tool
+        return func
+
+    def get(self, name):
+        return self.tools.get(name)
+
+    def __contains__(self, name):
+        return name in self.tools
+
+    def lookup(self, tool, args, memory_only=False):
+        """
+        (True, result) if a cacheable tool has a fresh result for `args`.
+        See ResultCache.get for `memory_only`.
+        """
+        if not tool.cacheable:
+            return False, None
+        return self.cache.get(tool.cache_key(args), memory_only)
+
+    def store(self, tool, args, result):
+        if tool.cacheable:
+            self.cache.put(tool.cache_key(args), result, ttl=tool.ttl)
+
+
+# Registry the actions in action.py register with
+registry = ToolRegistry()
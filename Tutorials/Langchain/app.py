@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import sys
+import threading
 import gradio as gr
-from langchain_community.document_loaders import CSVLoader
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain.chains import ConversationalRetrievalChain
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.vectorstores import Chroma
 import dotenv
 import os
 
+# Modules shared with the RAG app live in Tutorials/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from lazy import lazy
+
+# LangChain, OpenAI and Chroma are imported inside the lazy getters below, so
+# importing this module stays fast and the models, the vector store and the
+# chain are only built once, when first needed (or by warm_up).
+
 # Load environment variables
 dotenv.load_dotenv()
 
@@ -17,47 +23,110 @@ if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
 os.environ['OPENAI_API_KEY'] = api_key
-embeddings_model = OpenAIEmbeddings(model="text-embedding-3-large")
-llm = ChatOpenAI(model="gpt-4o-mini")
 
-# Load and process CSV files
-csv_paths = [
-    "/home/sanju/Intern_VH/Learning-GEN-AI/Tutorials/Langchain/Data/DiseaseAndSymptoms.csv",
-    "/home/sanju/Intern_VH/Learning-GEN-AI/Tutorials/Langchain/Data/Diseaseprecaution.csv"
-]
-
-# Check if vector store exists
-if not os.path.exists("./chroma_db"):
-    print("Creating new vector store...")
-    documents = []
-    for path in csv_paths:
-        loader = CSVLoader(file_path=path)
-        documents.extend(loader.load())
-        print(f"Loaded {len(documents)} documents from {path}")
-    
-    # Split documents
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    all_splits = text_splitter.split_documents(documents)
-    
-    # Create new vector store
-    vector_store = Chroma.from_documents(
-        documents=all_splits,
-        embedding=embeddings_model,
-        persist_directory="./chroma_db"
+@lazy
+def get_embeddings_model():
+    from embedding_cache import CachedEmbeddings, EmbeddingCache
+    from embedding_scheduler import ScheduledEmbeddings
+
+    return CachedEmbeddings(
+        ScheduledEmbeddings(
+            model="text-embedding-3-large",
+            api_key=api_key,
+            base_url=os.getenv("OPENAI_BASE_URL"),
+            max_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+        ),
+        EmbeddingCache(os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")),
+        model_name="text-embedding-3-large",
     )
-else:
-    print("Loading existing vector store...")
+
+@lazy
+def get_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o-mini")
+
+@lazy
+def get_answer_llm():
+    """
+    Streams the final answer; tagged so its tokens can be told apart from the
+    question-condensing call made with get_llm()
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o-mini", streaming=True, tags=["answer"])
+
+@lazy
+def get_history_manager():
+    """
+    Keeps recent turns verbatim and summarises older ones, so the prompt
+    stops growing with the session
+    """
+    from history import HistoryManager
+
+    return HistoryManager(get_llm(), max_tokens=int(os.getenv("HISTORY_MAX_TOKENS", "1500")))
+
+# Load and process CSV files
+data_dir = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data"))
+symptoms_csv = os.path.join(data_dir, "DiseaseAndSymptoms.csv")
+precautions_csv = os.path.join(data_dir, "Diseaseprecaution.csv")
+
+@lazy
+def get_diseases():
+    from ingest import load_diseases
+
+    return load_diseases(symptoms_csv, precautions_csv)
+
+@lazy
+def get_symptom_index():
+    """Exact symptom/precaution lookups that don't need the LLM"""
+    from symptom_index import SymptomIndex
+
+    return SymptomIndex(get_diseases())
+
+@lazy
+def get_vector_store():
+    """
+    Opens the vector store and embeds only the diseases whose data changed
+    since the last run (tracked in ./chroma_db/manifest.json)
+    """
+    from langchain.vectorstores import Chroma
+    from ingest import build_documents
+    from store_sync import sync_vector_store
+
     vector_store = Chroma(
         persist_directory="./chroma_db",
-        embedding_function=embeddings_model
+        embedding_function=get_embeddings_model()
+    )
+    changes = sync_vector_store(
+        vector_store,
+        build_documents(symptoms_csv, precautions_csv, get_diseases()),
+        [symptoms_csv, precautions_csv],
+        "./chroma_db/manifest.json",
     )
+    print("Vector store: " + ", ".join(f"{len(ids)} {kind}" for kind, ids in changes.items()))
+    return vector_store
 
-# Create conversation chain
-qa_chain = ConversationalRetrievalChain.from_llm(
-    llm,
-    vector_store.as_retriever(search_kwargs={'k': 3}),
-    return_source_documents=True
-)
+@lazy
+def get_qa_chain():
+    """Conversation chain over the hybrid retriever"""
+    from hybrid_retriever import HybridRetriever
+    from qa_chain import LookupQAChain
+
+    return LookupQAChain.from_llm(
+        get_answer_llm(),
+        HybridRetriever.from_vector_store(
+            get_vector_store(), k=3, rerank_fetch_k=int(os.getenv("RERANK_FETCH_K", "20"))
+        ),
+        condense_question_llm=get_llm(),
+        return_source_documents=True
+    )
+
+def warm_up():
+    """Builds every lazy object, so the first question doesn't pay for it."""
+    get_symptom_index()
+    get_history_manager()
+    get_qa_chain()
 
 # Custom CSS for styling
 custom_css = """
@@ -120,9 +189,10 @@ def format_sources(source_docs):
     
     for doc in source_docs:
         source = doc.metadata.get('source', 'Unknown CSV')
-        if source in seen_sources:
+        key = (source, doc.metadata.get('disease'))
+        if key in seen_sources:
             continue
-        seen_sources.add(source)
+        seen_sources.add(key)
         
         content = doc.page_content[:250] + "..." if len(doc.page_content) > 250 else doc.page_content
         formatted.append(f"""
@@ -133,23 +203,38 @@ def format_sources(source_docs):
         """)
     return "\n".join(formatted) if formatted else "<p style='color:#bbb;'>No sources found</p>"
 
-def respond(message, chat_history):
-    """Handle user query and update interface"""
-    # Run the QA chain
-    result = qa_chain.invoke({
-        "question": message,
-        "chat_history": [(q, a) for q, a in chat_history]
-    })
-    
-    # Get response and sources
-    answer = result['answer']
-    sources = format_sources(result['source_documents'])
-    
-    # Update chat history
-    chat_history.append((message, answer))
-    
-    # Return updated components
-    return "", chat_history, sources
+async def respond(message, chat_history):
+    """Handle user query and stream the answer into the interface"""
+    # Fast path: pure lookup questions are answered straight from the CSV data
+    symptom_index = await asyncio.to_thread(get_symptom_index)
+    answer = symptom_index.answer(message)
+    if answer is not None:
+        chat_history.append((message, answer))
+        sources = "<div class='ref-item'><b>Source:</b> Structured lookup in DiseaseAndSymptoms.csv, Diseaseprecaution.csv</div>"
+        yield "", chat_history, sources
+        return
+
+    qa_chain = await asyncio.to_thread(get_qa_chain)
+    history = await get_history_manager().aprepare((q, a) for q, a in chat_history)
+    # Questions that also ask something else get the lookup as context
+    inputs = {"question": message, "chat_history": history, "lookup": symptom_index.lookup(message)}
+    chat_history.append((message, ""))
+    sources = "<p style='color:#bbb;'>Searching references...</p>"
+    yield "", chat_history, sources
+
+    # Run the QA chain, forwarding answer tokens as they arrive
+    partial = ""
+    async for event in qa_chain.astream_events(inputs, version="v2"):
+        if event["event"] == "on_chat_model_stream" and "answer" in event["tags"]:
+            partial += event["data"]["chunk"].content
+            chat_history[-1] = (message, partial)
+            yield "", chat_history, sources
+        elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+            # Final output of the whole chain
+            result = event["data"]["output"]
+            chat_history[-1] = (message, result['answer'])
+            sources = format_sources(result['source_documents'])
+            yield "", chat_history, sources
 
 # Build the Gradio interface
 with gr.Blocks(css=custom_css, theme=gr.themes.Soft()) as demo:
@@ -173,6 +258,13 @@ with gr.Blocks(css=custom_css, theme=gr.themes.Soft()) as demo:
     )
     clear.click(lambda: (None, [], ""), None, [msg, chatbot, sources_box])
 
+# Handle many sessions at once; respond is async, so waiting on the LLM does
+# not hold a worker thread
+demo.queue(default_concurrency_limit=int(os.getenv("GRADIO_CONCURRENCY", "64")))
+
 # Launch the app
 if __name__ == "__main__":
+    # Build the chain in the background while the UI comes up
+    if os.getenv("WARM_UP", "1") == "1":
+        threading.Thread(target=warm_up, daemon=True).start()
     demo.launch(share=True)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from embedding_scheduler import count_tokens
+
+SUMMARY_PROMPT = """Summarise the conversation between a user and a medical knowledge assistant below.
+Keep the diseases, symptoms and precautions discussed and any facts the user gave about themselves.
+Answer in at most {max_words} words.
+
+Summary so far:
+{summary}
+
+New turns:
+{turns}
+"""
+
+SUMMARY_LABEL = "(Summary of the earlier conversation)"
+
+
+def _turn_tokens(turn):
+    question, answer = turn
+    return count_tokens(question) + count_tokens(answer or "")
+
+
+class HistoryManager:
+    """
+    Caps the chat history sent to the chain at about `max_tokens`.
+
+    The most recent turns are kept verbatim. Older turns are folded, `step`
+    turns at a time, into a running summary written by `llm`; turns that
+    don't fill a whole step yet stay verbatim, so the history can exceed
+    the cap by up to `step - 1` turns. The last turn is never summarised.
+    Summaries are cached by the exact turns they cover, so a session costs
+    one extra LLM call every `step` turns at most, however long it gets.
+    """
+
+    def __init__(self, llm, max_tokens=1500, summary_words=150, step=4, cache_size=1024):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary_words = summary_words
+        self.step = step
+        self.cache_size = cache_size
+        self._summaries = OrderedDict()  # hash of covered turns -> summary
+        self._lock = threading.Lock()
+
+    def _split(self, turns):
+        """Number of leading turns to summarise, a multiple of `step`."""
+        budget = self.max_tokens - 2 * self.summary_words  # room for the summary
+        recent_tokens = 0
+        keep = 0
+        for turn in reversed(turns):
+            recent_tokens += _turn_tokens(turn)
+            if recent_tokens > budget:
+                break
+            keep += 1
+        older = len(turns) - max(keep, 1)
+        return max(older, 0) // self.step * self.step  # whole steps only
+
+    @staticmethod
+    def _prefix_hashes(turns, n):
+        digest = hashlib.sha256()
+        hashes = [digest.hexdigest()]
+        for question, answer in turns[:n]:
+            digest.update(f"{len(question)}:{question}{len(answer or '')}:{answer or ''}".encode("utf-8"))
+            hashes.append(digest.hexdigest())
+        return hashes
+
+    def _cached(self, key):
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def _store(self, key, summary):
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+
+    def _plan(self, turns):
+        """
+        Works out which cached summary to extend with which turns.
+
+        Returns (n, hashes, start, summary): turns[:n] are to be summarised,
+        and the summary of turns[:start] is already cached.
+        """
+        n = self._split(turns)
+        hashes = self._prefix_hashes(turns, n)
+        starts = [n] + list(range((n - 1) // self.step * self.step, 0, -self.step))
+        for start in starts:
+            summary = self._cached(hashes[start])
+            if summary is not None:
+                return n, hashes, start, summary
+        return n, hashes, 0, "(none)"
+
+    def _prompt(self, summary, turns):
+        text = "\n".join(f"User: {q}\nAssistant: {a}" for q, a in turns)
+        return SUMMARY_PROMPT.format(max_words=self.summary_words, summary=summary, turns=text)
+
+    @staticmethod
+    def _result(turns, n, summary):
+        return ([(SUMMARY_LABEL, summary)] if n else []) + turns[n:]
+
+    def prepare(self, chat_history):
+        """Returns the (question, answer) pairs to pass as chat_history."""
+        turns = list(chat_history)
+        n, hashes, start, summary = self._plan(turns)
+        for i in range(start, n, self.step):
+            end = min(i + self.step, n)
+            summary = self.llm.invoke(self._prompt(summary, turns[i:end])).content
+            self._store(hashes[end], summary)
+        return self._result(turns, n, summary)
+
+    async def aprepare(self, chat_history):
+        """Async version of prepare."""
+        turns = list(chat_history)
+        n, hashes, start, summary = self._plan(turns)
+        for i in range(start, n, self.step):
+            end = min(i + self.step, n)
+            summary = (await self.llm.ainvoke(self._prompt(summary, turns[i:end]))).content
+            self._store(hashes[end], summary)
+        return self._result(turns, n, summary)
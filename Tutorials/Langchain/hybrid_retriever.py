@@ -0,0 +1,75 @@
+from typing import Any
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from bm25 import BM25Index, reciprocal_rank_fusion
+from rerank import lexical_scores, rerank
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves from the Chroma store and a BM25 index over the same
+    documents, and merges both rankings with reciprocal rank fusion, so
+    exact symptom names like `nodal_skin_eruptions` are found even when
+    the embedding does not rank them first.
+
+    With `rerank_fetch_k` set, the dense and BM25 candidates (that many of
+    each) are instead re-ranked with rerank.rerank on the embeddings held
+    by the store, and the top k kept.
+    """
+
+    vector_store: Any
+    bm25: Any
+    documents: dict  # Chroma id -> Document
+    k: int = 3
+    fetch_k: int = 20
+    rerank_fetch_k: int = 0
+    vectors: Any = None  # Chroma embeddings, one row per document
+    rows: dict = {}  # page content -> row of `vectors`
+
+    @classmethod
+    def from_vector_store(cls, vector_store, **kwargs):
+        """Builds the BM25 index from every document in the store."""
+        include = ["documents", "metadatas"]
+        if kwargs.get("rerank_fetch_k"):
+            include.append("embeddings")
+        data = vector_store.get(include=include)
+        bm25 = BM25Index()
+        documents = {}
+        for id_, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            bm25.add(id_, text)
+            documents[id_] = Document(page_content=text, metadata=metadata or {})
+        if "embeddings" in include:
+            kwargs["vectors"] = np.asarray(data["embeddings"], dtype=np.float32)
+            kwargs["rows"] = {text: row for row, text in enumerate(data["documents"])}
+        return cls(vector_store=vector_store, bm25=bm25, documents=documents, **kwargs)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        if self.rerank_fetch_k:
+            return self._reranked(query)
+        dense = self.vector_store.similarity_search(query, k=self.fetch_k)
+        sparse = [self.documents[id_] for id_, _ in self.bm25.search(query, self.fetch_k)]
+        # Chroma results carry no ids, so documents are matched by content.
+        by_content = {doc.page_content: doc for doc in sparse + dense}
+        fused = reciprocal_rank_fusion(
+            [[doc.page_content for doc in dense], [doc.page_content for doc in sparse]]
+        )
+        return [by_content[content] for content in fused[: self.k]]
+
+    def _reranked(self, query):
+        query_vector = self.vector_store.embeddings.embed_query(query)
+        dense = self.vector_store.similarity_search_by_vector(query_vector, k=self.rerank_fetch_k)
+        sparse = [self.documents[id_] for id_, _ in self.bm25.search(query, self.rerank_fetch_k)]
+        candidates = list({doc.page_content: doc for doc in dense + sparse}.values())
+        chosen = rerank(
+            query_vector,
+            self.vectors[[self.rows[doc.page_content] for doc in candidates]],
+            self.k,
+            lexical=lexical_scores(query, [doc.page_content for doc in candidates]),
+        )
+        return [candidates[i] for i in chosen]
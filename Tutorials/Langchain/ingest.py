@@ -0,0 +1,103 @@
+import csv
+import os
+import re
+from collections import Counter
+
+from langchain_core.documents import Document
+
+
+def normalize_symptom(raw):
+    """
+    Canonical symptom token, e.g. " dischromic _patches" -> "dischromic_patches"
+    and "foul_smell_of urine" -> "foul_smell_of_urine".
+    """
+    token = re.sub(r"\s*_\s*", "_", raw.strip().lower())
+    return re.sub(r"\s+", "_", token)
+
+
+def normalize_disease(raw):
+    """Disease name with collapsed whitespace, e.g. "Diabetes " -> "Diabetes"."""
+    return " ".join(raw.split())
+
+
+def load_diseases(symptoms_path, precautions_path):
+    """
+    Reads both CSVs into one record per disease.
+
+    Returns:
+        dict: disease -> {
+            "symptom_sets": distinct symptom combinations (frozensets), in
+                            first-seen order,
+            "symptom_counts": Counter of how many rows list each symptom,
+            "rows": number of CSV rows for the disease,
+            "precautions": list of precautions,
+        }
+    """
+    diseases = {}
+    with open(symptoms_path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)  # header
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            disease = normalize_disease(row[0])
+            symptoms = frozenset(normalize_symptom(cell) for cell in row[1:] if cell.strip())
+            record = diseases.setdefault(
+                disease,
+                {"symptom_sets": {}, "symptom_counts": Counter(), "rows": 0, "precautions": []},
+            )
+            record["symptom_sets"].setdefault(symptoms, None)  # dict keeps insertion order
+            record["symptom_counts"].update(symptoms)
+            record["rows"] += 1
+
+    by_key = {disease.lower(): record for disease, record in diseases.items()}
+    with open(precautions_path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)  # header
+        for row in reader:
+            if not row:
+                continue
+            record = by_key.get(normalize_disease(row[0]).lower())
+            if record is not None:
+                record["precautions"] = [cell.strip() for cell in row[1:] if cell.strip()]
+
+    for record in diseases.values():
+        record["symptom_sets"] = list(record["symptom_sets"])
+    return diseases
+
+
+def disease_to_text(disease, record):
+    symptoms = [symptom for symptom, _ in record["symptom_counts"].most_common()]
+    lines = [
+        f"Disease: {disease}",
+        f"Symptoms (most common first): {', '.join(symptoms)}",
+        "Reported symptom combinations:",
+    ]
+    lines += [f"- {', '.join(sorted(symptom_set))}" for symptom_set in record["symptom_sets"]]
+    if record["precautions"]:
+        lines.append(f"Precautions: {', '.join(record['precautions'])}")
+    return "\n".join(lines)
+
+
+def build_documents(symptoms_path, precautions_path, diseases=None):
+    """
+    One Document per disease instead of one per CSV row: duplicate symptom
+    sets are dropped and the disease's precautions are joined in, so the
+    corpus has a few dozen documents instead of thousands of near-duplicates.
+    Pass `diseases` from load_diseases to avoid reading the CSVs again.
+    """
+    if diseases is None:
+        diseases = load_diseases(symptoms_path, precautions_path)
+    sources = f"{os.path.basename(symptoms_path)}, {os.path.basename(precautions_path)}"
+    return [
+        Document(
+            page_content=disease_to_text(disease, record),
+            metadata={
+                "id": f"disease:{disease.lower()}",
+                "source": sources,
+                "disease": disease,
+                "rows": record["rows"],
+            },
+        )
+        for disease, record in diseases.items()
+    ]
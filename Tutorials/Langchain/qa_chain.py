@@ -0,0 +1,26 @@
+from langchain.chains import ConversationalRetrievalChain
+from langchain_core.documents import Document
+
+LOOKUP_SOURCE = "Structured lookup in DiseaseAndSymptoms.csv, Diseaseprecaution.csv"
+
+
+class LookupQAChain(ConversationalRetrievalChain):
+    """
+    ConversationalRetrievalChain that also takes an optional "lookup" input,
+    the SymptomIndex result for the question, and puts it first among the
+    retrieved documents so the answer can rely on it.
+    """
+
+    @staticmethod
+    def _with_lookup(docs, inputs):
+        lookup = inputs.get("lookup")
+        if not lookup:
+            return docs
+        return [Document(page_content=lookup, metadata={"source": LOOKUP_SOURCE}), *docs]
+
+    def _get_docs(self, question, inputs, *, run_manager):
+        return self._with_lookup(super()._get_docs(question, inputs, run_manager=run_manager), inputs)
+
+    async def _aget_docs(self, question, inputs, *, run_manager):
+        docs = await super()._aget_docs(question, inputs, run_manager=run_manager)
+        return self._with_lookup(docs, inputs)
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_hash(doc):
+    payload = json.dumps([doc.page_content, doc.metadata], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def sources_changed(manifest, source_paths):
+    """True unless the manifest has the same hash for every source file."""
+    if manifest is None:
+        return True
+    recorded = manifest.get("files", {})
+    return any(recorded.get(os.path.basename(p)) != file_hash(p) for p in source_paths)
+
+
+def sync_vector_store(vector_store, documents, source_paths, manifest_path):
+    """
+    Brings a Chroma store in line with `documents`, embedding only what changed.
+
+    The manifest records a hash per source file and per document id (the
+    "id" metadata field). If no source file changed nothing is read or
+    embedded. Otherwise new and edited documents are upserted and vanished
+    ones deleted. A store without a manifest was built by an older version
+    with random ids, so it is cleared first.
+
+    Returns:
+        dict: Ids that were added, updated and deleted.
+    """
+    manifest = load_manifest(manifest_path)
+    changes = {"added": [], "updated": [], "deleted": []}
+    if not sources_changed(manifest, source_paths):
+        return changes
+
+    if manifest is None:
+        stale_ids = vector_store.get(include=[])["ids"]
+        if stale_ids:
+            vector_store.delete(ids=stale_ids)
+        manifest = {"files": {}, "documents": {}}
+
+    recorded = manifest["documents"]
+    current = {doc.metadata["id"]: doc for doc in documents}
+    hashes = {id_: document_hash(doc) for id_, doc in current.items()}
+
+    changes["added"] = [id_ for id_ in current if id_ not in recorded]
+    changes["updated"] = [id_ for id_ in current if id_ in recorded and recorded[id_] != hashes[id_]]
+    changes["deleted"] = [id_ for id_ in recorded if id_ not in current]
+
+    if changes["deleted"]:
+        vector_store.delete(ids=changes["deleted"])
+    upsert_ids = changes["added"] + changes["updated"]
+    if upsert_ids:
+        # Chroma's add_documents upserts, so edited documents are replaced.
+        vector_store.add_documents([current[id_] for id_ in upsert_ids], ids=upsert_ids)
+
+    save_manifest(
+        manifest_path,
+        {
+            "files": {os.path.basename(p): file_hash(p) for p in source_paths},
+            "documents": hashes,
+        },
+    )
+    return changes
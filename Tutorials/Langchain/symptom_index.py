@@ -0,0 +1,153 @@
+import re
+
+from ingest import load_diseases
+
+DISEASE_QUESTION = re.compile(
+    r"\b(which|what)\b.*\b(disease|diseases|condition|conditions|illness|illnesses)\b"
+    r"|\bcould (i|it|this) (have|be)\b|\bdiagnos",
+    re.IGNORECASE,
+)
+PRECAUTION_QUESTION = re.compile(r"\bprecautions?\b|\bwhat should i do\b", re.IGNORECASE)
+# Words a pure lookup question may contain besides symptoms and diseases.
+# Anything else ("best medicine", "how is it spread") is left to the LLM.
+LOOKUP_WORDS = frozenset(
+    """
+    a an the and or of for with to in on about from by also any some all please
+    i m me my it s this that is are am be been have has had having get got feel feeling
+    do does did could can might may would should will which what whats
+    disease diseases condition conditions illness illnesses cause causes causing caused
+    symptom symptoms sign signs diagnose diagnosis diagnosed
+    precaution precautions take list show tell give
+    """.split()
+)
+
+
+def _words(text):
+    return " " + " ".join(re.findall(r"[a-z0-9]+", text.lower().replace("_", " "))) + " "
+
+
+class SymptomIndex:
+    """
+    Exact symptom -> disease lookup over the CSV data.
+
+    Each disease keeps a bitset of its symptoms (an int, one bit per
+    symptom) and each symptom a bitset of its diseases, so ranking the
+    diseases for a set of symptoms is a handful of AND + popcount
+    operations, with no embedding or LLM call.
+    """
+
+    def __init__(self, diseases):
+        self.diseases = list(diseases)
+        self.precautions = [diseases[d]["precautions"] for d in self.diseases]
+        symptoms = sorted({s for record in diseases.values() for s in record["symptom_counts"]})
+        self.symptoms = symptoms
+        self.symptom_bits = {symptom: 1 << i for i, symptom in enumerate(symptoms)}
+        self.disease_masks = []
+        self.symptom_diseases = dict.fromkeys(symptoms, 0)
+        for i, disease in enumerate(self.diseases):
+            mask = 0
+            for symptom in diseases[disease]["symptom_counts"]:
+                mask |= self.symptom_bits[symptom]
+                self.symptom_diseases[symptom] |= 1 << i
+            self.disease_masks.append(mask)
+        # Phrases as they appear in plain text, longest first so that
+        # "high fever" wins over "fever".
+        self._symptom_phrases = sorted(
+            ((_words(symptom), symptom) for symptom in symptoms), key=lambda p: -len(p[0])
+        )
+        self._disease_phrases = sorted(
+            ((_words(disease), i) for i, disease in enumerate(self.diseases)),
+            key=lambda p: -len(p[0]),
+        )
+        self._lookup_phrases = sorted(
+            {phrase for phrase, _ in self._symptom_phrases + self._disease_phrases},
+            key=lambda p: -len(p),
+        )
+
+    @classmethod
+    def from_csv(cls, symptoms_path, precautions_path):
+        return cls(load_diseases(symptoms_path, precautions_path))
+
+    def find_symptoms(self, text):
+        """Known symptoms mentioned in free text, e.g. "skin rash" or "skin_rash"."""
+        text = _words(text)
+        found = []
+        for phrase, symptom in self._symptom_phrases:
+            if phrase in text:
+                found.append(symptom)
+                text = text.replace(phrase, " ")
+        return found
+
+    def find_disease(self, text):
+        text = _words(text)
+        for phrase, i in self._disease_phrases:
+            if phrase in text:
+                return i
+        return None
+
+    def rank_diseases(self, symptoms, k=5):
+        """
+        Diseases sharing the most symptoms with `symptoms`, as
+        (disease, matched count, disease symptom count) tuples. Ties go to
+        the disease with fewer unmatched symptoms.
+        """
+        query = 0
+        candidates = 0
+        for symptom in symptoms:
+            query |= self.symptom_bits.get(symptom, 0)
+            candidates |= self.symptom_diseases.get(symptom, 0)
+        ranked = []
+        while candidates:
+            low_bit = candidates & -candidates
+            i = low_bit.bit_length() - 1
+            candidates ^= low_bit
+            mask = self.disease_masks[i]
+            ranked.append(((mask & query).bit_count(), -mask.bit_count(), i))
+        ranked.sort(reverse=True)
+        return [
+            (self.diseases[i], matched, -total) for matched, total, i in ranked[:k]
+        ]
+
+    def is_pure_lookup(self, question):
+        """True if `question` says nothing beyond symptoms, diseases and lookup phrasing."""
+        text = _words(question)
+        for phrase in self._lookup_phrases:
+            while phrase in text:
+                text = text.replace(phrase, " ")
+        return all(word in LOOKUP_WORDS for word in text.split())
+
+    def lookup(self, question):
+        """
+        Looks up "which disease has symptoms X, Y" and "precautions for D"
+        questions in the data. Returns None for anything else.
+        """
+        if PRECAUTION_QUESTION.search(question):
+            i = self.find_disease(question)
+            if i is not None and self.precautions[i]:
+                items = "\n".join(f"- {p}" for p in self.precautions[i])
+                return f"Precautions for {self.diseases[i]}:\n{items}"
+
+        if DISEASE_QUESTION.search(question):
+            symptoms = self.find_symptoms(question)
+            if len(symptoms) >= 2:
+                ranked = self.rank_diseases(symptoms)
+                lines = [
+                    f"{n}. {disease} ({matched} of {len(symptoms)} symptoms matched)"
+                    for n, (disease, matched, _) in enumerate(ranked, 1)
+                ]
+                return (
+                    f"Diseases in the dataset matching {', '.join(symptoms)}:\n"
+                    + "\n".join(lines)
+                    + "\n\nThis is a lookup in the reference data, not a diagnosis."
+                )
+        return None
+
+    def answer(self, question):
+        """
+        Answers the question straight from the data when it is nothing but a
+        lookup. Returns None otherwise, so the caller falls back to the LLM
+        chain, passing it `lookup(question)` as context if there is one.
+        """
+        if not self.is_pure_lookup(question):
+            return None
+        return self.lookup(question)
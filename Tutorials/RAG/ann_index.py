@@ -0,0 +1,106 @@
+import math
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Faiss wants about 39 training points per IVF centroid.
+MIN_POINTS_PER_CENTROID = 39
+# Below 2**MIN_PQ_BITS training points an "ivf_pq" index is built as
+# IVF-Flat instead; it is retrained as IVF-PQ once the corpus grows.
+MIN_PQ_BITS = 4
+
+
+def build_index(index_type, vectors, nlist=None, pq_m=None, pq_bits=8, hnsw_m=32, ef_construction=80):
+    """
+    Creates an empty FAISS index of the given type, trained on `vectors`.
+
+    Args:
+        index_type (str): One of
+            "flat"     exact search, cost grows linearly with the corpus.
+            "ivf_flat" inverted file over `nlist` k-means centroids; only
+                       `nprobe` lists are scanned per query.
+            "hnsw"     graph index, no training, tuned with `ef_search`.
+            "ivf_pq"   IVF with product-quantized vectors, `pq_m` bytes per
+                       vector at 8 bits, for corpora that do not fit in RAM.
+                       Too few vectors to train PQ give an IVF-Flat index.
+        vectors (np.ndarray): Sample of vectors to train on, shape (n, dim).
+        nlist (int): Number of IVF centroids, defaults to 4 * sqrt(n).
+
+    Returns:
+        faiss.Index: A trained index without vectors.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+        return index
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+    nlist = nlist or int(4 * math.sqrt(n))
+    nlist = max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat" or n < 2**MIN_PQ_BITS:
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        pq_m = pq_m or _default_pq_m(dim)
+        # PQ codebooks need 2**pq_bits training points each.
+        pq_bits = min(pq_bits, max(1, int(math.log2(n))))
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits)
+    index.train(vectors)
+    return index
+
+
+def _default_pq_m(dim):
+    # Largest divisor of dim that keeps at least 8 dimensions per sub-vector.
+    for m in range(min(64, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def mmap_flags(path):
+    """
+    faiss.read_index flags that memory-map the vectors of the index saved
+    at `path`. IVF indexes keep them in inverted lists, mapped by
+    IO_FLAG_MMAP; flat and HNSW indexes keep them as flat codes, which
+    only IO_FLAG_MMAP_IFC maps (IO_FLAG_MMAP reads them into memory).
+    """
+    with open(path, "rb") as f:
+        ivf = f.read(2) == b"Iw"  # fourcc of every IVF index type
+    return (faiss.IO_FLAG_MMAP if ivf else faiss.IO_FLAG_MMAP_IFC) | faiss.IO_FLAG_READ_ONLY
+
+
+def stores_exact_vectors(index):
+    """True if `index` can reconstruct the vectors it was given, unlike PQ."""
+    return not isinstance(index, faiss.IndexIVFPQ)
+
+
+def supports_removal(index):
+    """True if remove_ids keeps vector positions contiguous, as LangChain's FAISS expects."""
+    return isinstance(index, faiss.IndexFlat)
+
+
+def search_params(index, nprobe=None, ef_search=None):
+    """Per-query faiss.SearchParameters for `index`, or None for the defaults."""
+    if nprobe and isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if ef_search and isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
+
+def bytes_per_vector(index):
+    """Approximate memory per stored vector, including HNSW graph links."""
+    if isinstance(index, faiss.IndexHNSW):
+        return index.d * 4 + 2 * index.hnsw.nb_neighbors(0) * 4
+    try:
+        return index.sa_code_size()
+    except RuntimeError:
+        return index.d * 4
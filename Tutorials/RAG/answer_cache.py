@@ -0,0 +1,85 @@
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Caches answers by query embedding.
+
+    A lookup hits when a stored query in the same namespace (e.g. document
+    and index version) is within `max_distance` cosine distance of the new
+    query and has not expired. When full, the least recently used entry is
+    replaced.
+    """
+
+    def __init__(self, max_distance=0.05, ttl=3600, max_entries=1000):
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vectors = None  # (max_entries, dim) unit vectors, allocated on first put
+        self.namespaces = [None] * max_entries
+        self.answers = [None] * max_entries
+        self.expires = np.zeros(max_entries)
+        self.last_used = np.zeros(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace, query_vector):
+        """Returns the cached answer for a similar query, or None."""
+        with self._lock:
+            if self.vectors is None:
+                self.misses += 1
+                return None
+            now = time.monotonic()
+            scores = self.vectors @ self._normalize(query_vector)
+            usable = (self.expires > now) & np.array([ns == namespace for ns in self.namespaces])
+            scores[~usable] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < 1 - self.max_distance:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.last_used[best] = now
+            return self.answers[best]
+
+    def put(self, namespace, query_vector, answer):
+        vector = self._normalize(query_vector)
+        with self._lock:
+            if self.vectors is None:
+                self.vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            now = time.monotonic()
+            # Free or expired slots have the smallest last_used once cleared.
+            self.last_used[self.expires <= now] = 0
+            slot = int(np.argmin(self.last_used))
+            self.vectors[slot] = vector
+            self.namespaces[slot] = namespace
+            self.answers[slot] = answer
+            self.expires[slot] = now + self.ttl
+            self.last_used[slot] = now
+
+    def clear(self, namespace=None):
+        """Drops every entry, or only those of `namespace`."""
+        with self._lock:
+            for slot, ns in enumerate(self.namespaces):
+                if namespace is None or ns == namespace:
+                    self.namespaces[slot] = self.answers[slot] = None
+                    self.expires[slot] = self.last_used[slot] = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": int(np.count_nonzero(self.expires > time.monotonic())),
+            }
@@ -1,29 +1,174 @@
+import asyncio
+import hashlib
+import json
 import os
-import faiss
-import numpy as np
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
-from pypdf import PdfReader
-from io import BytesIO
 from dotenv import load_dotenv
 from pydantic import BaseModel
-import openai
 
+# Modules shared with the Langchain app live in Tutorials/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from lazy import lazy
 
-# Directly set your OpenAI API key
-openai.api_key = "OPENAI_API_KEY"
+# OpenAI, LangChain, FAISS and PDF modules are imported inside the lazy
+# getters below, so importing this module (and answering /health) stays fast.
 
-# Initialize OpenAI client (no need to pass the API key again)
-client = openai
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+SESSION_DIR = os.getenv("SESSION_DIR", "./sessions")
+# Fuse BM25 keyword hits with the dense results
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+# Re-rank this many first-stage candidates down to the top 3; 0 disables
+RERANK_FETCH_K = int(os.getenv("RERANK_FETCH_K", "50"))
+# Chunks retrieved per question, and the most prompt tokens they may take
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000"))
+
+# Bounded pool for short blocking work (session loading, FAISS searches),
+# so it never runs on the event loop
+blocking_pool = ThreadPoolExecutor(max_workers=int(os.getenv("BLOCKING_WORKERS", "4")))
+# Uploads and deletes hold a thread for their whole PDF parsing, embedding
+# and index rebuild, so they get their own pool and can't stall /chat/
+indexing_pool = ThreadPoolExecutor(max_workers=int(os.getenv("INDEXING_WORKERS", "2")))
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking function on the worker pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_pool, lambda: func(*args, **kwargs))
+
+async def run_indexing(func, *args, **kwargs):
+    """Like run_blocking, on the pool for uploads and deletes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(indexing_pool, lambda: func(*args, **kwargs))
+
+@lazy
+def get_client():
+    """Async OpenAI client sharing one pool of keep-alive connections."""
+    import httpx
+    import openai
+
+    return openai.AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=20,
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        ),
+    )
+
+@lazy
+def get_embeddings():
+    from embedding_cache import CachedEmbeddings, EmbeddingCache
+    from embedding_scheduler import ScheduledEmbeddings
+
+    return CachedEmbeddings(
+        ScheduledEmbeddings(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            max_concurrency=int(os.getenv("EMBEDDING_CONCURRENCY", "4")),
+        ),
+        EmbeddingCache(os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")),
+    )
+
+def make_index():
+    from index_manager import IndexManager
+
+    return IndexManager(
+        get_embeddings(),
+        index_type=os.getenv("INDEX_TYPE", "flat"),  # flat, ivf_flat, hnsw or ivf_pq
+        nprobe=int(os.getenv("INDEX_NPROBE", "8")),
+        ef_search=int(os.getenv("INDEX_EF_SEARCH", "64")),
+    )
+
+@lazy
+def get_sessions():
+    """
+    One FAISS index per session (the X-Session-ID header), kept in memory
+    up to SESSION_MEMORY_MB and spilled to SESSION_DIR beyond that.
+    """
+    from session_store import SessionIndexes
+
+    return SessionIndexes(
+        make_index,
+        SESSION_DIR,
+        max_bytes=int(os.getenv("SESSION_MEMORY_MB", "512")) * 2**20,
+        max_sessions=int(os.getenv("MAX_OPEN_SESSIONS", "256")),
+    )
+
+@asynccontextmanager
+async def session_index(session_id):
+    """The session's index, held in memory for the duration of the block."""
+    sessions = await run_blocking(get_sessions)
+    try:
+        index = await run_blocking(sessions.acquire, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        yield index
+    finally:
+        await run_blocking(sessions.release, session_id)
+
+@lazy
+def get_answer_cache():
+    """Answers to near-identical questions about the same index generation."""
+    from answer_cache import SemanticAnswerCache
+
+    return SemanticAnswerCache(
+        max_distance=float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.05")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+    )
+
+@lazy
+def get_text_splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+
+def warm_up():
+    """Builds every lazy object, so the first request doesn't pay for it."""
+    get_client()
+    get_sessions()
+    get_embeddings()
+    get_answer_cache()
+    get_text_splitter()
+    import index_manager, pdf_pipeline  # noqa: F401
 
 # Initialize FastAPI
 app = FastAPI()
 
+@app.on_event("startup")
+async def startup():
+    # In the background: the worker answers /health while this runs
+    if os.getenv("WARM_UP", "1") == "1":
+        asyncio.get_running_loop().run_in_executor(blocking_pool, warm_up)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if get_client.initialized():
+        await get_client().close()
+    if get_embeddings.initialized():
+        get_embeddings().embeddings.close()
+    from pdf_pipeline import shutdown_pool
+
+    shutdown_pool()
+    blocking_pool.shutdown(wait=False)
+    indexing_pool.shutdown(wait=False)
+
+@app.get("/health")
+async def health():
+    """Liveness plus whether the clients and session store are loaded yet."""
+    return {"status": "ok", "ready": get_sessions.initialized() and get_client.initialized()}
+
 # Serve static frontend files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -32,53 +177,68 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def serve_frontend():
     return FileResponse("static/index.html")
 
-# Initialize FAISS Index
-index = None
-embeddings = OpenAIEmbeddings(openai_api_key=openai.api_key)
+def split_pdf(file_content: bytes):
+    """Extracts a PDF page by page and yields its chunks as they are split."""
+    from pdf_pipeline import iter_chunks, iter_pdf_pages
+
+    return iter_chunks(iter_pdf_pages(file_content), get_text_splitter())
 
-def extract_text_from_pdf(file_content: BytesIO):
-    """Extracts text from a PDF file."""
-    pdf_reader = PdfReader(file_content)
-    text = "\n".join([page.extract_text() for page in pdf_reader.pages if page.extract_text()])
-    return text
+def index_pdf(session_id, index, file_content: bytes, doc_id=None, metadata=None):
+    """Splits, embeds and indexes a PDF in batches, then persists the session's index."""
+    with get_sessions().update(session_id, index):
+        return index.add_document(split_pdf(file_content), doc_id=doc_id, metadata=metadata)
 
-def create_vector_store(text):
-    """Splits text into chunks, embeds them, and stores in FAISS."""
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-    texts = text_splitter.split_text(text)
-    docs = [Document(page_content=chunk) for chunk in texts]
-    faiss_index = FAISS.from_documents(docs, embeddings)
-    return faiss_index
+def remove_document(session_id, index, doc_id):
+    """Removes a document from the session's index and persists it."""
+    with get_sessions().update(session_id, index):
+        return index.remove_document(doc_id)
 
 @app.post("/upload/")
-async def upload_document(file: UploadFile = File(...)):
-    """Handles document uploads, extracts text, and indexes it in FAISS."""
-    global index
-    try:
-        file_content = await file.read()
-        document_text = extract_text_from_pdf(BytesIO(file_content))
-        index = create_vector_store(document_text)
-        return {"message": "Document uploaded and indexed successfully."}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"message": str(e)})
+async def upload_document(
+    file: UploadFile = File(...),
+    doc_id: str = Form(None),
+    x_session_id: str = Header("default"),
+):
+    """Handles document uploads, extracts text, and adds it to the session's FAISS index."""
+    async with session_index(x_session_id) as index:
+        try:
+            file_content = await file.read()
+            # Uploading the same file again replaces it instead of adding a copy
+            doc_id = doc_id or hashlib.sha256(file_content).hexdigest()[:32]
+            doc_id = await run_indexing(
+                index_pdf, x_session_id, index, file_content,
+                doc_id=doc_id, metadata={"source": file.filename},
+            )
+            return {"message": "Document uploaded and indexed successfully.", "doc_id": doc_id}
+        except Exception as e:
+            return JSONResponse(status_code=500, content={"message": str(e)})
+
+@app.get("/documents/")
+async def list_documents(x_session_id: str = Header("default")):
+    """Lists the session's indexed documents and their chunk counts."""
+    async with session_index(x_session_id) as index:
+        return {"documents": index.list_documents()}
+
+@app.delete("/documents/{doc_id}")
+async def delete_document(doc_id: str, x_session_id: str = Header("default")):
+    """Removes a document's vectors from the session's index."""
+    async with session_index(x_session_id) as index:
+        if not await run_indexing(remove_document, x_session_id, index, doc_id):
+            return JSONResponse(status_code=404, content={"message": "Unknown document."})
+    return {"message": "Document deleted successfully."}
 
 # Request model for chat
 class ChatRequest(BaseModel):
     query: str
+    doc_id: str | None = None
+    stream: bool = False
 
-@app.post("/chat/")
-async def chat_with_model(request: ChatRequest):
-    """Retrieves relevant document chunks and generates a response using GPT API."""
-    query = request.query  # Extract query from request
-
-    if index is None:
-        return JSONResponse(status_code=400, content={"message": "No document uploaded!"})
+def build_messages(query, relevant_docs):
+    """Builds the chat messages for a query and its retrieved chunks."""
+    from context_packer import pack_context
 
-    relevant_docs = index.similarity_search(query, k=3)
-    if not relevant_docs:
-        return JSONResponse(status_code=404, content={"message": "No relevant information found in document."})
-
-    context = "\n".join([doc.page_content for doc in relevant_docs])
+    # Overlapping neighbours are merged, so no text is sent twice
+    context = "\n\n".join(pack_context(relevant_docs, CONTEXT_TOKEN_BUDGET))
     augmented_query = f"""
     You are an AI assistant that answers questions based on the provided document. Use the following context to generate a response:
     
@@ -87,15 +247,107 @@ async def chat_with_model(request: ChatRequest):
 
     Question: {query}
     """
+    return [
+        {"role": "system", "content": "You are a helpful assistant that answers based on the document provided."},
+        {"role": "user", "content": augmented_query}
+    ]
+
+def retrieve(index, query, query_vector, doc_id=None):
+    """The chunks to answer from, using the configured search."""
+    if RERANK_FETCH_K:
+        return index.reranked_search(
+            query,
+            query_vector,
+            k=RETRIEVAL_K,
+            doc_id=doc_id,
+            fetch_k=RERANK_FETCH_K,
+            hybrid=HYBRID_SEARCH,
+        )
+    if HYBRID_SEARCH:
+        return index.hybrid_search(query, query_vector, k=RETRIEVAL_K, doc_id=doc_id)
+    return index.similarity_search_by_vector(query_vector, k=RETRIEVAL_K, doc_id=doc_id)
+
+@app.post("/chat/")
+async def chat_with_model(request: ChatRequest, x_session_id: str = Header("default")):
+    """Retrieves relevant document chunks and generates a response using GPT API."""
+    query = request.query  # Extract query from request
+    client = await run_blocking(get_client)
+    answer_cache = get_answer_cache()
 
-    # ✅ Updated OpenAI API call
-    response = openai.ChatCompletion.create(
+    async with session_index(x_session_id) as index:
+        if index.is_empty():
+            return JSONResponse(status_code=400, content={"message": "No document uploaded!"})
+
+        embeddings = await run_blocking(get_embeddings)
+        query_vector = await embeddings.aembed_query(query)
+        cache_namespace = f"{x_session_id}/{request.doc_id or '*'}@{index.generation}"
+        cached_answer = answer_cache.get(cache_namespace, query_vector)
+        if cached_answer is not None:
+            if request.stream:
+                return event_stream(replay_answer(cached_answer))
+            return {"response": cached_answer}
+
+        relevant_docs = await run_blocking(retrieve, index, query, query_vector, request.doc_id)
+    if not relevant_docs:
+        return JSONResponse(status_code=404, content={"message": "No relevant information found in document."})
+
+    messages = build_messages(query, relevant_docs)
+    on_answer = lambda answer: answer_cache.put(cache_namespace, query_vector, answer)
+    if request.stream:
+        return event_stream(stream_completion(messages, on_answer))
+
+    response = await client.chat.completions.create(
         model="gpt-4",  # Use "gpt-3.5-turbo" if needed
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that answers based on the document provided."},
-            {"role": "user", "content": augmented_query}
-        ],
+        messages=messages,
         temperature=0.5
     )
 
-    return {"response": response.choices[0].message.content}
+    answer = response.choices[0].message.content
+    on_answer(answer)
+    return {"response": answer}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters of the answer cache."""
+    return (await run_blocking(get_answer_cache)).stats()
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Open session indexes and their estimated memory use."""
+    return await run_blocking((await run_blocking(get_sessions)).stats)
+
+def sse_event(data, event=None):
+    """Formats one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def event_stream(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def replay_answer(answer):
+    yield sse_event({"token": answer})
+    yield sse_event({}, event="done")
+
+async def stream_completion(messages, on_answer=None):
+    """Forwards completion tokens as Server-Sent Events as they arrive."""
+    try:
+        stream = await get_client().chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            temperature=0.5,
+            stream=True,
+        )
+        tokens = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                tokens.append(chunk.choices[0].delta.content)
+                yield sse_event({"token": tokens[-1]})
+        if on_answer:
+            on_answer("".join(tokens))
+        yield sse_event({}, event="done")
+    except Exception as e:
+        yield sse_event({"message": str(e)}, event="error")
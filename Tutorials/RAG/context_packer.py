@@ -0,0 +1,70 @@
+from embedding_scheduler import count_tokens
+
+# Shorter matches between the end of one chunk and the start of the next
+# are treated as coincidence, not splitter overlap.
+MIN_OVERLAP = 20
+
+
+def merge_overlap(left, right, min_overlap=MIN_OVERLAP):
+    """
+    Joins two consecutive chunks, dropping the text the splitter repeated
+    at the start of `right`. Returns None if they don't overlap.
+    """
+    start = left.find(right[:min_overlap], max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return left + right[len(left) - start:]
+        start = left.find(right[:min_overlap], start + 1)
+    return None
+
+
+def _passages(chunks):
+    """
+    Merges (rank, doc_id, chunk number, text) tuples of the same document
+    with consecutive chunk numbers. Returns (rank, text) per passage, where
+    rank is the best rank among its chunks.
+    """
+    passages = []
+    previous = None
+    for rank, doc_id, number, text in sorted(chunks, key=lambda c: (str(c[1]), c[2] is None, c[2] or 0)):
+        if (
+            previous is not None
+            and number is not None
+            and previous[1] == doc_id
+            and previous[2] is not None
+            and number == previous[2] + 1
+        ):
+            best, merged = passages[-1]
+            passages[-1] = (min(best, rank), merge_overlap(merged, text) or f"{merged}\n{text}")
+        else:
+            passages.append((rank, text))
+        previous = (rank, doc_id, number)
+    return sorted(passages)
+
+
+def pack_context(docs, max_tokens=1000):
+    """
+    Packs retrieved chunks into as few prompt tokens as possible.
+
+    Chunks are taken in relevance order. Adjacent chunks of the same
+    document (by the "doc_id" and "chunk" metadata) are merged with their
+    overlap removed, chunks whose text is already included are dropped,
+    and chunks that would push the context past `max_tokens` are skipped.
+    The most relevant chunk is always kept.
+
+    Returns:
+        list[str]: Passages, most relevant first.
+    """
+    chosen = []
+    passages = []
+    for rank, doc in enumerate(docs):
+        text = doc.page_content.strip()
+        if not text or any(text in other for _, _, _, other in chosen):
+            continue
+        candidate = [c for c in chosen if c[3] not in text]
+        candidate.append((rank, doc.metadata.get("doc_id"), doc.metadata.get("chunk"), text))
+        packed = _passages(candidate)
+        if chosen and sum(count_tokens(passage) for _, passage in packed) > max_tokens:
+            continue
+        chosen, passages = candidate, packed
+    return [passage for _, passage in passages]
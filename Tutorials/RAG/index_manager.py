@@ -0,0 +1,541 @@
+import itertools
+import json
+import os
+import pickle
+import threading
+import uuid
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from ann_index import (
+    build_index,
+    bytes_per_vector,
+    mmap_flags,
+    search_params,
+    stores_exact_vectors,
+    supports_removal,
+)
+from bm25 import BM25Index, reciprocal_rank_fusion
+from rerank import lexical_scores, rerank
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are not coordinated between processes
+    fcntl = None
+
+# IVF centroids are retrained once the corpus grows this many times over
+# the set they were trained on.
+RETRAIN_GROWTH = 4
+
+
+class IndexManager:
+    """
+    Keeps every uploaded document in one FAISS store and remembers which
+    vectors belong to which document, so uploads only embed the new chunks.
+
+    `index_type` and `index_params` select the FAISS index, see
+    ann_index.build_index. Index types other than "flat" cannot delete
+    vectors in place, so deleting a document rebuilds the index from the
+    remaining chunks. The vectors are read back from the index, except for
+    ivf_pq, which embeds the chunks again; wrap the embeddings in
+    CachedEmbeddings to make that free of API calls. `nprobe` and `ef_search` set the default search
+    effort of IVF and HNSW indexes.
+    """
+
+    def __init__(self, embeddings, index_type="flat", index_params=None, nprobe=None, ef_search=None):
+        self.embeddings = embeddings
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.store = None
+        self.documents = {}  # doc_id -> list of docstore ids
+        self.version = 0  # bumped on every change and load, for caches in this process
+        # Random id of the content, saved with it, for caches that outlive
+        # this process or this copy of the index (e.g. cached answers)
+        self.generation = uuid.uuid4().hex
+        self._trained_on = 0
+        self._bm25 = None  # built on first hybrid search
+        self._positions = None  # (version, docstore id -> position), see _get_positions
+        self._memory = (None, 0)  # (version, bytes), see memory_bytes
+        self._mmapped_file = None  # open handle of the memory-mapped index file
+        self._disk_state = None  # documents.json as last loaded or saved, see _state_on_disk
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return 0 if self.store is None else self.store.index.ntotal
+
+    def is_empty(self):
+        return len(self) == 0
+
+    def add_document(self, chunks, doc_id=None, metadata=None, batch_size=512):
+        """
+        Embeds the chunks of one document and appends them to the index.
+
+        Chunks are consumed, embedded and added `batch_size` at a time, so
+        a generator of chunks (see pdf_pipeline.iter_chunks) never has the
+        whole document's text and vectors waiting in memory. An existing
+        document with the same id is only removed once all new chunks are
+        in, and a failed upload removes the chunks it added.
+
+        Args:
+            chunks (iterable[str]): Text chunks of the document.
+            doc_id (str): Identifier of the document. A new one is generated
+                          if omitted; an existing document with the same id
+                          is replaced.
+            metadata (dict): Extra metadata stored with every chunk.
+
+        Returns:
+            str: The document id.
+        """
+        doc_id = doc_id or uuid.uuid4().hex
+        # New ids differ from those of the copy being replaced, as both are
+        # in the index until the upload completes.
+        prefix = f"{doc_id}:{uuid.uuid4().hex[:8]}"
+        chunks = (chunk for chunk in chunks if chunk.strip())
+        ids = []
+        try:
+            while batch := list(itertools.islice(chunks, batch_size)):
+                self._add_batch(batch, prefix, len(ids), doc_id, metadata, ids)
+        except BaseException:
+            if ids:
+                with self._lock:
+                    self._remove_ids(ids)
+                    self._changed()
+            raise
+        if not ids:
+            raise ValueError("Document contains no text to index.")
+
+        with self._lock:
+            self._remove(doc_id)
+            if self.index_type.startswith("ivf") and len(self) >= RETRAIN_GROWTH * self._trained_on:
+                self._rebuild()
+            self.documents[doc_id] = ids
+            self._changed()
+        return doc_id
+
+    def _add_batch(self, chunks, prefix, start, doc_id, metadata, ids):
+        # Embedding is the slow part, so do it outside the lock.
+        vectors = self.embeddings.embed_documents(chunks)
+        batch_ids = [f"{prefix}:{start + i}" for i in range(len(chunks))]
+        metadatas = [
+            {**(metadata or {}), "doc_id": doc_id, "chunk": start + i}
+            for i in range(len(chunks))
+        ]
+        with self._lock:
+            self._make_writable()
+            if self.store is None:
+                self.store = self._new_store(vectors)
+            self.store.add_embeddings(list(zip(chunks, vectors)), metadatas=metadatas, ids=batch_ids)
+            ids.extend(batch_ids)
+            if self._bm25 is not None:
+                for id_, chunk in zip(batch_ids, chunks):
+                    self._bm25.add(id_, chunk)
+            self._changed()
+
+    def remove_document(self, doc_id):
+        """Deletes all vectors of a document. Returns False if it is unknown."""
+        with self._lock:
+            self._make_writable()
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        ids = self.documents.pop(doc_id, None)
+        if not ids:
+            return False
+        self._remove_ids(ids)
+        self._changed()
+        return True
+
+    def _remove_ids(self, ids):
+        if self._bm25 is not None:
+            for id_ in ids:
+                self._bm25.remove(id_)
+        if supports_removal(self.store.index):
+            self.store.delete(ids)
+        else:
+            self._rebuild(exclude=set(ids))
+
+    def _changed(self):
+        self.version += 1
+        self.generation = uuid.uuid4().hex
+
+    def _new_store(self, training_vectors):
+        index = build_index(self.index_type, np.array(training_vectors), **self.index_params)
+        self._trained_on = len(training_vectors)
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+
+    def _rebuild(self, exclude=()):
+        """Re-creates the index from the stored chunks, minus `exclude` ids."""
+        kept = [
+            (position, id_)
+            for position, id_ in sorted(self.store.index_to_docstore_id.items())
+            if id_ not in exclude
+        ]
+        docs = [self.store.docstore.search(id_) for _, id_ in kept]
+        self._bm25 = None
+        if not docs:
+            self.store = None
+            return
+        texts = [doc.page_content for doc in docs]
+        if stores_exact_vectors(self.store.index):
+            vectors = self._reconstruct([position for position, _ in kept])
+        else:
+            # PQ codes only approximate the vectors, so embed again.
+            vectors = self.embeddings.embed_documents(texts)
+        self.store = self._new_store(vectors)
+        self.store.add_embeddings(
+            list(zip(texts, vectors)),
+            metadatas=[doc.metadata for doc in docs],
+            ids=[id_ for _, id_ in kept],
+        )
+
+    def rebuild(self):
+        """Re-creates, and for IVF indexes retrains, the index on the whole corpus."""
+        with self._lock:
+            if self.store is not None:
+                self._make_writable()
+                self._rebuild()
+                self._changed()
+
+    def memory_bytes(self):
+        """
+        Rough size of the vectors and chunk texts held by this index. Never
+        waits: while another thread holds the index, e.g. for an upload, the
+        size it had when last measured is returned.
+        """
+        if not self._lock.acquire(blocking=False):
+            return self._memory[1]
+        try:
+            if self.store is None:
+                self._memory = (self.version, 0)
+            elif self._memory[0] != self.version:
+                index = self.store.index
+                texts = sum(
+                    len(self.store.docstore.search(id_).page_content)
+                    for id_ in self.store.index_to_docstore_id.values()
+                )
+                self._memory = (self.version, index.ntotal * bytes_per_vector(index) + texts)
+            return self._memory[1]
+        finally:
+            self._lock.release()
+
+    def list_documents(self):
+        with self._lock:
+            return {doc_id: len(ids) for doc_id, ids in self.documents.items()}
+
+    def similarity_search(self, query, k=3, doc_id=None, **search_kwargs):
+        """Searches all documents, or only `doc_id` when given."""
+        if self.is_empty():
+            return []
+        return self.similarity_search_by_vector(
+            self.embeddings.embed_query(query), k, doc_id, **search_kwargs
+        )
+
+    def similarity_search_by_vector(self, query_vector, k=3, doc_id=None, nprobe=None, ef_search=None):
+        """
+        Like similarity_search, for a query that is already embedded.
+
+        `nprobe` (IVF) and `ef_search` (HNSW) override the default search
+        effort for this query: higher is slower but finds more true neighbours.
+        """
+        if self.is_empty():
+            return []
+        with self._lock:
+            return self._dense_search(query_vector, k, doc_id, nprobe, ef_search)
+
+    def _dense_search(self, query_vector, k, doc_id=None, nprobe=None, ef_search=None):
+        return [doc for _, doc in self._dense_hits(query_vector, k, doc_id, nprobe, ef_search)]
+
+    def _dense_hits(self, query_vector, k, doc_id=None, nprobe=None, ef_search=None):
+        """(position, document) pairs of the k nearest chunks, of `doc_id` only when given."""
+        query = np.array([query_vector], dtype=np.float32)
+        if doc_id is not None:
+            return self._document_hits(query, k, doc_id)
+        index = self.store.index
+        params = search_params(index, nprobe or self.nprobe, ef_search or self.ef_search)
+        _, positions = index.search(query, min(k, index.ntotal), params=params)
+        return [
+            (int(position), self.store.docstore.search(self.store.index_to_docstore_id[position]))
+            for position in positions[0]
+            if position >= 0
+        ]
+
+    def _document_hits(self, query, k, doc_id):
+        """
+        Exact search among one document's chunks, on their stored vectors.
+        Searching the whole index and dropping other documents' chunks
+        would return fewer than k hits when the document is a small part
+        of the index.
+        """
+        ids = self.documents.get(doc_id)
+        if not ids:
+            return []
+        lookup = self._get_positions()
+        positions = np.array([lookup[id_] for id_ in ids], dtype=np.int64)
+        distances = ((self._reconstruct(positions) - query) ** 2).sum(axis=1)
+        nearest = positions[np.argsort(distances)[:k]]
+        return [
+            (int(position), self.store.docstore.search(self.store.index_to_docstore_id[int(position)]))
+            for position in nearest
+        ]
+
+    def hybrid_search(self, query, query_vector, k=3, doc_id=None, fetch_k=20, **search_kwargs):
+        """
+        Fuses dense results with BM25 keyword results by reciprocal rank,
+        so exact terms the embedding misses are still retrieved.
+        """
+        if self.is_empty():
+            return []
+        with self._lock:
+            dense = self._dense_search(query_vector, fetch_k, doc_id, **search_kwargs)
+            allowed = (lambda id_: id_.startswith(f"{doc_id}:")) if doc_id else None
+            sparse = self._get_bm25().search(query, fetch_k, allowed=allowed)
+            docs = {doc.id: doc for doc in dense}
+            fused = reciprocal_rank_fusion([[doc.id for doc in dense], [id_ for id_, _ in sparse]])
+            return [docs.get(id_) or self.store.docstore.search(id_) for id_ in fused[:k]]
+
+    def reranked_search(
+        self, query, query_vector, k=3, doc_id=None, fetch_k=50, hybrid=True,
+        lexical_weight=0.3, diversity=0.3, **search_kwargs
+    ):
+        """
+        Two-stage search: fetches `fetch_k` candidates (dense, plus BM25 when
+        `hybrid`), then re-ranks them with rerank.rerank on the vectors
+        already stored in the index, so no extra embedding calls are made.
+        A cheap first stage (low nprobe / ef_search) is fine, as long as
+        the good chunks make it into the candidates.
+        """
+        if self.is_empty():
+            return []
+        with self._lock:
+            hits = self._dense_hits(query_vector, fetch_k, doc_id, **search_kwargs)
+            if hybrid:
+                allowed = (lambda id_: id_.startswith(f"{doc_id}:")) if doc_id else None
+                positions = self._get_positions()
+                seen = {position for position, _ in hits}
+                for id_, _ in self._get_bm25().search(query, fetch_k, allowed=allowed):
+                    if positions[id_] not in seen:
+                        hits.append((positions[id_], self.store.docstore.search(id_)))
+            if not hits:
+                return []
+            vectors = self._reconstruct([position for position, _ in hits])
+        docs = [doc for _, doc in hits]
+        chosen = rerank(
+            query_vector,
+            vectors,
+            k,
+            lexical=lexical_scores(query, [doc.page_content for doc in docs]),
+            lexical_weight=lexical_weight,
+            diversity=diversity,
+        )
+        return [docs[i] for i in chosen]
+
+    def _reconstruct(self, positions):
+        """Stored vectors at `positions` (approximate for ivf_pq)."""
+        index = self.store.index
+        positions = np.array(positions, dtype=np.int64)
+        try:
+            return index.reconstruct_batch(positions)
+        except RuntimeError:
+            # IVF indexes need a position -> list lookup table first.
+            faiss.extract_index_ivf(index).make_direct_map()
+            return index.reconstruct_batch(positions)
+
+    def _get_positions(self):
+        """Docstore id -> index position, rebuilt after the index changes."""
+        if self._positions is None or self._positions[0] != self.version:
+            mapping = {id_: position for position, id_ in self.store.index_to_docstore_id.items()}
+            self._positions = (self.version, mapping)
+        return self._positions[1]
+
+    def _get_bm25(self):
+        if self._bm25 is None:
+            self._bm25 = BM25Index()
+            for id_ in self.store.index_to_docstore_id.values():
+                self._bm25.add(id_, self.store.docstore.search(id_).page_content)
+        return self._bm25
+
+    @contextmanager
+    def update(self, directory):
+        """
+        Block that changes the index saved in `directory`, e.g.
+
+            with index.update(directory):
+                index.add_document(chunks)
+
+        Only one process at a time can be in the block for a directory. It
+        starts by loading the copy on disk if another process saved a newer
+        one, and saves the index at the end if it changed, so workers never
+        overwrite each other's uploads.
+        """
+        with _directory_lock(directory, exclusive=True):
+            if self._state_on_disk(directory) not in (None, self._disk_state):
+                self._load(directory)
+            version = self.version
+            yield self
+            if self.version != version:
+                self._save(directory)
+
+    def refresh(self, directory):
+        """Loads the copy in `directory` if another process saved a newer one."""
+        if self._state_on_disk(directory) in (None, self._disk_state):
+            return False
+        return self.load(directory)
+
+    def save(self, directory):
+        """
+        Writes the FAISS index, docstore and document table to `directory`.
+
+        Files are written next to the old ones and swapped in with
+        os.replace, so workers that memory-mapped the previous index keep
+        reading a consistent copy. Returns False, without writing, if
+        another process saved the directory since this index was loaded or
+        saved: that copy is newer.
+        """
+        with _directory_lock(directory, exclusive=True):
+            if self._state_on_disk(directory) not in (None, self._disk_state):
+                return False
+            self._save(directory)
+            return True
+
+    def _save(self, directory):
+        with self._lock:
+            if self.store is None:
+                # Every document was deleted: drop the old index files, so
+                # they aren't loaded again, and keep an empty document table.
+                for name in ("index.faiss", "index.pkl"):
+                    try:
+                        os.remove(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        pass
+                path = os.path.join(directory, "documents.json")
+                _dump_json(self._document_table(), path + ".tmp")
+                os.replace(path + ".tmp", path)
+                self._disk_state = self._state_on_disk(directory)
+                return
+            files = {
+                "index.faiss": lambda path: faiss.write_index(self.store.index, path),
+                "index.pkl": lambda path: _dump_pickle(
+                    (self.store.docstore, self.store.index_to_docstore_id), path
+                ),
+                # Last, as other processes watch it to notice a new save.
+                "documents.json": lambda path: _dump_json(self._document_table(), path),
+            }
+            for name, write in files.items():
+                path = os.path.join(directory, name)
+                write(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            self._disk_state = self._state_on_disk(directory)
+
+    def load(self, directory, mmap=True):
+        """
+        Loads an index written by `save`. Returns False if there is none.
+
+        With `mmap` the vectors (and, for IVF, the inverted lists) are
+        memory-mapped instead of read into the process, so loading takes
+        no time and every worker shares the same pages of the OS page
+        cache. Mapped vectors are read-only: the index is read into memory
+        the first time it is modified.
+        """
+        with _directory_lock(directory, exclusive=False):
+            return self._load(directory, mmap)
+
+    def _load(self, directory, mmap=True):
+        documents_path = os.path.join(directory, "documents.json")
+        index_path = os.path.join(directory, "index.faiss")
+        if not os.path.exists(documents_path):
+            return False
+
+        with open(documents_path) as f:
+            table = json.load(f)
+        if isinstance(table.get("documents"), dict):
+            documents, generation = table["documents"], table["generation"]
+        else:  # saved before generations were recorded
+            documents, generation = table, uuid.uuid4().hex
+        store, mmapped_file = None, None
+        if os.path.exists(index_path):  # missing once every document was deleted
+            flags = mmap_flags(index_path) if mmap else 0
+            # Keep the mapped file open, so a writable copy can be read from it
+            # even after another worker replaces the file on disk.
+            mmapped_file = open(index_path, "rb") if mmap else None
+            faiss_index = faiss.read_index(index_path, flags)
+            with open(os.path.join(directory, "index.pkl"), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            store = FAISS(
+                embedding_function=self.embeddings,
+                index=faiss_index,
+                docstore=docstore,
+                index_to_docstore_id=index_to_docstore_id,
+            )
+
+        with self._lock:
+            self.store = store
+            self.documents = documents
+            self.version += 1
+            self.generation = generation
+            self._bm25 = None
+            self._trained_on = len(self)
+            self._close_mmapped_file()
+            self._mmapped_file = mmapped_file
+            self._disk_state = self._state_on_disk(directory)
+        return True
+
+    def _document_table(self):
+        return {"generation": self.generation, "documents": self.documents}
+
+    @staticmethod
+    def _state_on_disk(directory):
+        """Identity of the saved documents.json, which changes on every save."""
+        try:
+            stat = os.stat(os.path.join(directory, "documents.json"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _make_writable(self):
+        if self._mmapped_file is not None:
+            # Streamed from the open file, so only the index itself is held
+            # in memory, not also a copy of the file.
+            self._mmapped_file.seek(0)
+            self.store.index = faiss.read_index(faiss.PyCallbackIOReader(self._mmapped_file.read))
+            self._close_mmapped_file()
+
+    def _close_mmapped_file(self):
+        if self._mmapped_file is not None:
+            self._mmapped_file.close()
+            self._mmapped_file = None
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    """Advisory lock on `directory` shared by all processes, see fcntl.flock."""
+    if fcntl is None or not (exclusive or os.path.isdir(directory)):
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _dump_pickle(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _dump_json(obj, path):
+    with open(path, "w") as f:
+        json.dump(obj, f)
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from lazy import lazy
+
+# Below this many pages, starting worker processes costs more than it saves.
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 8
+# Size of the one process pool shared by all uploads
+MAX_WORKERS = int(os.getenv("PDF_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_worker_reader = (None, None)  # (path, PdfReader) of the PDF a worker last read
+
+
+@lazy
+def get_pool():
+    """
+    The process pool for page extraction, started on first use. Workers
+    are started by a fork server (or spawned), not forked from the
+    multithreaded server process.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(MAX_WORKERS, mp_context=context)
+
+
+def shutdown_pool():
+    if get_pool.initialized():
+        get_pool().shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_pages(path, start, stop):
+    global _worker_reader
+    if _worker_reader[0] != path:
+        _worker_reader = (path, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(data, workers=None):
+    """
+    Yields the text of each non-empty page of a PDF, in page order.
+
+    Every page is extracted exactly once. Large PDFs are split into page
+    ranges that are extracted in the shared process pool; only a few
+    ranges per upload are in flight at a time, so the whole text is never
+    held in memory. Workers read the PDF from a temporary file rather than
+    receiving its bytes with every task.
+
+    Args:
+        data (bytes): The PDF file content.
+        workers (int): Pool processes this upload may keep busy, defaults
+                       to all of them; 1 extracts in this thread.
+    """
+    reader = PdfReader(BytesIO(data))
+    page_count = len(reader.pages)
+    workers = min(workers or MAX_WORKERS, MAX_WORKERS)
+
+    if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            text = page.extract_text()
+            if text:
+                yield text
+        return
+
+    ranges = iter(
+        (start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    )
+    pool = get_pool()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    pending = deque()
+    try:
+        for page_range in ranges:
+            pending.append(pool.submit(_extract_pages, f.name, *page_range))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            for text in pending.popleft().result():
+                if text:
+                    yield text
+            page_range = next(ranges, None)
+            if page_range:
+                pending.append(pool.submit(_extract_pages, f.name, *page_range))
+    finally:
+        for future in pending:
+            future.cancel()
+        os.unlink(f.name)
+
+
+def iter_chunks(pages, text_splitter):
+    """
+    Splits a stream of page texts into chunks without joining the pages.
+
+    The last chunk of each page is carried over and split again together
+    with the next page, so chunks still run across page boundaries.
+    """
+    carry = ""
+    for text in pages:
+        chunks = text_splitter.split_text(f"{carry}\n{text}" if carry else text)
+        if not chunks:
+            continue
+        yield from chunks[:-1]
+        carry = chunks[-1]
+    if carry:
+        yield carry
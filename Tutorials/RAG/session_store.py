@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from lazy import lazy
+
+# Session ids end up in file paths, so only plain names are accepted.
+SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionIndexes:
+    """
+    One IndexManager per session, so clients never see or overwrite each
+    other's documents.
+
+    Every change is saved to `directory` as it is made, see update. Open
+    indexes are kept in an LRU. When their estimated size passes
+    `max_bytes`, or more than `max_sessions` are open, the least recently
+    used ones that no request is using are dropped from memory. The
+    session's next request loads its index back, memory-mapped.
+    """
+
+    def __init__(self, make_index, directory, max_bytes=512 * 2**20, max_sessions=256):
+        self.make_index = make_index
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self._open = OrderedDict()  # session id -> lazy getter of its IndexManager
+        self._users = {}  # session id -> number of requests using its index
+        self._lock = threading.Lock()
+
+    def path(self, session_id):
+        return os.path.join(self.directory, session_id)
+
+    def acquire(self, session_id):
+        """
+        Returns the session's index, loading or creating it, and keeps it in
+        memory until the matching release.
+        """
+        if not SESSION_ID.match(session_id):
+            raise ValueError(f"Invalid session id {session_id!r}")
+        with self._lock:
+            getter = self._open.get(session_id)
+            if getter is None:
+                getter = self._open[session_id] = lazy(lambda: self._load(session_id))
+            self._open.move_to_end(session_id)
+            self._users[session_id] = self._users.get(session_id, 0) + 1
+        try:
+            index = getter()
+            # Another worker may have changed the session since it was loaded.
+            index.refresh(self.path(session_id))
+            return index
+        except Exception:
+            self.release(session_id)
+            raise
+
+    def release(self, session_id):
+        with self._lock:
+            self._users[session_id] -= 1
+            if not self._users[session_id]:
+                del self._users[session_id]
+        self._spill()
+
+    @contextmanager
+    def use(self, session_id):
+        """acquire and release as a context manager."""
+        index = self.acquire(session_id)
+        try:
+            yield index
+        finally:
+            self.release(session_id)
+
+    @contextmanager
+    def update(self, session_id, index):
+        """
+        Block that changes the session's index and saves it, one process
+        at a time, see IndexManager.update.
+        """
+        with index.update(self.path(session_id)):
+            yield index
+
+    def __len__(self):
+        return len(self._open)
+
+    def stats(self):
+        with self._lock:
+            indexes = [getter() for getter in self._open.values() if getter.initialized()]
+            return {
+                "open_sessions": len(self._open),
+                "in_use": len(self._users),
+                "memory_bytes": sum(index.memory_bytes() for index in indexes),
+            }
+
+    def _load(self, session_id):
+        index = self.make_index()
+        index.load(self.path(session_id))
+        return index
+
+    def _spill(self):
+        """Drops least recently used idle indexes until within the limits."""
+        with self._lock:
+            # memory_bytes doesn't wait for indexes busy with an upload.
+            sizes = {
+                session_id: getter().memory_bytes()
+                for session_id, getter in self._open.items()
+                if getter.initialized()
+            }
+            total = sum(sizes.values())
+            for session_id in list(self._open):  # least recently used first
+                if total <= self.max_bytes and len(self._open) <= self.max_sessions:
+                    break
+                if session_id in self._users:
+                    continue
+                # Already saved by update, so it can simply be dropped.
+                del self._open[session_id]
+                total -= sizes.get(session_id, 0)
@@ -1,11 +1,30 @@
 let documentUploaded = false;
 
+// Each browser keeps its own documents on the server, under this id
+function getSessionId() {
+    let sessionId = localStorage.getItem("sessionId");
+    if (!sessionId) {
+        sessionId = crypto.randomUUID();
+        localStorage.setItem("sessionId", sessionId);
+    }
+    return sessionId;
+}
+
+// Documents uploaded in an earlier visit are still there
+fetch("/documents/", { headers: { "X-Session-ID": getSessionId() } })
+    .then(response => response.json())
+    .then(result => { documentUploaded = Object.keys(result.documents || {}).length > 0; });
+
 async function uploadFile() {
     const fileInput = document.getElementById("file-upload");
     const formData = new FormData();
     formData.append("file", fileInput.files[0]);
 
-    const response = await fetch("/upload/", { method: "POST", body: formData });
+    const response = await fetch("/upload/", {
+        method: "POST",
+        headers: { "X-Session-ID": getSessionId() },
+        body: formData
+    });
     const result = await response.json();
     
     if (result.message.includes("successfully")) {
@@ -28,19 +47,61 @@ async function sendQuery() {
         return;
     }
 
+    appendMessage("user", query);
+    document.getElementById("user-query").value = "";
+    const botMessage = appendMessage("bot", "");
+
     const response = await fetch("/chat/", {
         method: "POST",
         headers: {
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "X-Session-ID": getSessionId()
         },
-        body: JSON.stringify({ "query": query })
+        body: JSON.stringify({ "query": query, "stream": true })
     });
 
-    const result = await response.json();
+    if (!response.ok) {
+        const result = await response.json();
+        botMessage.textContent = "Error: " + (result.message || JSON.stringify(result));
+        return;
+    }
 
-    if (result.response) {
-        alert("AI Response: " + result.response);
-    } else {
-        alert("Error: " + JSON.stringify(result));
+    // Render tokens as the Server-Sent Events arrive
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const event of events) {
+            const { name, data } = parseEvent(event);
+            if (name === "error") {
+                botMessage.textContent += "\nError: " + data.message;
+            } else if (data.token) {
+                botMessage.textContent += data.token;
+            }
+        }
+    }
+}
+
+function parseEvent(event) {
+    let name = "message";
+    let data = "";
+    for (const line of event.split("\n")) {
+        if (line.startsWith("event: ")) name = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
     }
+    return { name, data: data ? JSON.parse(data) : {} };
+}
+
+function appendMessage(role, text) {
+    const message = document.createElement("div");
+    message.className = "chat " + role;
+    message.textContent = text;
+    document.getElementById("chat-container").appendChild(message);
+    return message;
 }
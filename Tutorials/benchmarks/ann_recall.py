@@ -0,0 +1,86 @@
+"""
+Recall vs latency of the FAISS index types in Tutorials/RAG/ann_index.py.
+
+Builds each index over a synthetic clustered corpus, then reports recall@k
+against exact search and per-query latency percentiles for a sweep of
+nprobe / efSearch values, plus the index size.
+
+Run with:
+    python ann_recall.py --n 1000000 --dim 256
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "RAG"))
+from ann_index import build_index, search_params  # noqa: E402
+
+SWEEPS = {
+    "flat": [{}],
+    "ivf_flat": [{"nprobe": p} for p in (1, 4, 16, 64)],
+    "hnsw": [{"ef_search": e} for e in (16, 32, 64, 128)],
+    "ivf_pq": [{"nprobe": p} for p in (1, 4, 16, 64)],
+}
+
+
+def synthetic_corpus(n, dim, queries, clusters=1000, seed=0):
+    """Gaussian clusters, roughly like embeddings of many topics."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n + queries)
+    points = centers[labels] + 0.8 * rng.standard_normal((n + queries, dim)).astype(np.float32)
+    return points[:n], points[n:]
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+def run(args):
+    corpus, queries = synthetic_corpus(args.n, args.dim, args.queries)
+    faiss.omp_set_num_threads(args.threads)
+
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{args.n} vectors, dim {args.dim}, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<10} {'params':<16} {'build s':>8} {'MB':>8} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for index_type in args.types:
+        start = time.perf_counter()
+        sample = corpus[np.random.default_rng(1).permutation(args.n)[: args.train_size]]
+        index = build_index(index_type, sample)
+        index.add(corpus)
+        build_seconds = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        for params in SWEEPS[index_type]:
+            search = search_params(index, **params)
+            found, latencies = [], []
+            for query in queries:
+                start = time.perf_counter()
+                _, ids = index.search(query[None, :], args.k, params=search)
+                latencies.append(time.perf_counter() - start)
+                found.append(ids[0])
+            recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+            label = ",".join(f"{key}={value}" for key, value in params.items()) or "-"
+            print(
+                f"{index_type:<10} {label:<16} {build_seconds:>8.1f} {size_mb:>8.1f} {recall:>7.3f}"
+                f" {percentile_ms(latencies, 50):>8.3f} {percentile_ms(latencies, 95):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int, default=100_000, help="vectors used to train IVF indexes")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS threads; 1 measures single-query latency")
+    parser.add_argument("--types", nargs="+", default=list(SWEEPS), choices=list(SWEEPS))
+    run(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Concurrent sessions of the agent in Tutorials/AI_AGENT_TUT against the fake
+OpenAI server in agent mode (FAKE_AGENT=1).
+
+Runs --sessions conversations on one event loop through one Agent, each
+asking for the response times of a few sites, and reports session
+latency, throughput, tool cache hits and peak RSS.
+
+Run with:
+    python bench_agent.py --sessions 500 --max-concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from harness import add_report_arguments, fake_openai_server, finish, latency_summary, peak_rss_mb, use_app
+
+SITES = ["netflix.com", "google.com", "youtube.com", "facebook.com", "wikipedia.org", "github.com"]
+
+
+async def run_sessions(args):
+    from action import registry
+    from agent import Agent, make_client
+
+    agent = Agent(
+        registry,
+        make_client(api_key="sk-benchmark", base_url=os.environ["OPENAI_BASE_URL"], max_connections=args.connections),
+        max_concurrency=args.max_concurrency,
+    )
+    rng = random.Random(0)
+    prompts = [
+        f"What is the response time for {' and '.join(rng.sample(SITES, 3))}?" for _ in range(args.sessions)
+    ]
+    samples, answers = [], []
+
+    async def session(prompt):
+        start = time.perf_counter()
+        answers.append(await agent.run(prompt))
+        samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(session(prompt) for prompt in prompts))
+    finally:
+        await agent.close()
+    seconds = time.perf_counter() - start
+    answered = sum(answer.startswith("Answer:") for answer in answers)
+    return {
+        "sessions": {
+            **latency_summary(samples),
+            "sessions_per_s": round(len(prompts) / seconds, 1),
+            "answered": answered,
+        },
+        "tools": {"cache_hits": registry.cache.hits, "cache_misses": registry.cache.misses},
+    }
+
+
+def run(args):
+    with fake_openai_server(agent=1, chat_latency=args.chat_latency, token_delay=0):
+        use_app("AI_AGENT_TUT")
+        results = asyncio.run(run_sessions(args))
+    results["memory"] = {"peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--max-concurrency", type=int, default=100, help="completion requests in flight")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--chat-latency", type=float, default=0.2, help="fake seconds per completion")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    finish(run(args), args)
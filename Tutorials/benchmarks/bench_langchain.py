@@ -0,0 +1,121 @@
+"""
+End-to-end benchmark of the medical assistant (Tutorials/Langchain)
+against the fake OpenAI server, with synthetic disease CSVs.
+
+Reports vector store build and re-sync time, retrieval latency, the
+structured lookup fast path, time to first token and full answer latency
+of `respond` under concurrency, and peak RSS.
+
+Run with:
+    python bench_langchain.py --diseases 200 --queries 100 --output langchain.json
+    python bench_langchain.py --diseases 200 --queries 100 --baseline langchain.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from harness import add_report_arguments, fake_openai_server, finish, latency_summary, peak_rss_mb, use_app
+from synthetic_data import make_disease_csvs, make_questions
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def lookup_questions(app, count, seed=0):
+    """Structured "which disease" questions over the synthetic symptoms."""
+    rng = random.Random(seed)
+    symptoms = app.get_symptom_index().symptoms
+    return [
+        f"Which disease has {' and '.join(s.replace('_', ' ') for s in rng.sample(symptoms, 3))}?"
+        for _ in range(count)
+    ]
+
+
+async def respond_latencies(app, questions, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    first_token, total = [], []
+
+    async def ask(question):
+        async with semaphore:
+            start = time.perf_counter()
+            first = None
+            async for _, chat_history, _ in app.respond(question, []):
+                if first is None and chat_history[-1][1]:
+                    first = time.perf_counter() - start
+            total.append(time.perf_counter() - start)
+            first_token.append(first if first is not None else total[-1])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(question) for question in questions))
+    seconds = time.perf_counter() - start
+    return (
+        latency_summary(first_token),
+        {**latency_summary(total), "requests_per_s": round(len(questions) / seconds, 2)},
+    )
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench_langchain_")
+    data_dir = os.path.join(workdir, "Data")
+    make_disease_csvs(data_dir, diseases=args.diseases, rows_per_disease=args.rows_per_disease)
+    os.environ.update(DATA_DIR=data_dir, EMBEDDING_CACHE_DIR=os.path.join(workdir, "embedding_cache"))
+    os.chdir(workdir)  # the app keeps its Chroma store in ./chroma_db
+
+    with fake_openai_server(latency=args.embedding_latency, chat_latency=args.chat_latency, token_delay=0.005):
+        use_app("Langchain")
+        start = time.perf_counter()
+        import app
+
+        results = {"startup": {"import_s": round(time.perf_counter() - start, 3)}}
+
+        from store_sync import sync_vector_store
+        from ingest import build_documents
+
+        build_seconds = timed(app.get_vector_store)
+        resync_seconds = timed(
+            sync_vector_store,
+            app.get_vector_store(),
+            build_documents(app.symptoms_csv, app.precautions_csv),
+            [app.symptoms_csv, app.precautions_csv],
+            "./chroma_db/manifest.json",
+        )
+        results["ingestion"] = {
+            "diseases": args.diseases,
+            "build_s": round(build_seconds, 3),
+            "diseases_per_s": round(args.diseases / build_seconds, 1),
+            "resync_unchanged_s": round(resync_seconds, 4),
+        }
+
+        questions = make_questions(args.queries, seed=1)
+        retriever = app.get_qa_chain().retriever
+        retriever.invoke(questions[0])
+        results["retrieval"] = latency_summary([timed(retriever.invoke, q) for q in questions])
+
+        symptom_index = app.get_symptom_index()
+        lookups = lookup_questions(app, args.queries)
+        results["lookup"] = latency_summary([timed(symptom_index.answer, q) for q in lookups])
+
+        first_token, total = asyncio.run(respond_latencies(app, questions, args.concurrency))
+        results["first_token"] = first_token
+        results["respond"] = total
+        results["memory"] = {"peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diseases", type=int, default=200)
+    parser.add_argument("--rows-per-disease", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent respond() calls")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="fake seconds per embedding request")
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="fake seconds to the first token")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    finish(run(args), args)
@@ -0,0 +1,130 @@
+"""
+End-to-end benchmark of the RAG app (Tutorials/RAG) against the fake
+OpenAI server, with synthetic PDFs.
+
+Reports upload throughput, retrieval latency per search mode, /chat/
+latency under concurrency and the peak RSS of the process serving the app.
+
+Run with:
+    python bench_rag.py --documents 5 --pages 40 --queries 200 --output rag.json
+    python bench_rag.py --baseline rag.json   # exits 1 on a >20% regression
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from harness import add_report_arguments, fake_openai_server, finish, latency_summary, peak_rss_mb, use_app
+from synthetic_data import make_pdf, make_questions
+
+SESSION = "bench"
+
+
+async def upload(client, pdfs):
+    start = time.perf_counter()
+    for i, pdf in enumerate(pdfs):
+        response = await client.post(
+            "/upload/",
+            headers={"X-Session-ID": SESSION},
+            files={"file": (f"doc{i}.pdf", pdf, "application/pdf")},
+        )
+        response.raise_for_status()
+    seconds = time.perf_counter() - start
+    documents = (await client.get("/documents/", headers={"X-Session-ID": SESSION})).json()["documents"]
+    return seconds, sum(documents.values())
+
+
+def retrieval_latencies(app, questions):
+    """Latency of each search mode over already-embedded questions."""
+    vectors = app.get_embeddings().embed_documents(questions)
+    modes = {
+        "dense": lambda index, q, v: index.similarity_search_by_vector(v, k=app.RETRIEVAL_K),
+        "hybrid": lambda index, q, v: index.hybrid_search(q, v, k=app.RETRIEVAL_K),
+        "reranked": lambda index, q, v: index.reranked_search(
+            q, v, k=app.RETRIEVAL_K, fetch_k=app.RERANK_FETCH_K or 50
+        ),
+    }
+    results = {}
+    with app.get_sessions().use(SESSION) as index:
+        for name, search in modes.items():
+            search(index, questions[0], vectors[0])  # builds BM25 and other lazy state
+            samples = []
+            for question, vector in zip(questions, vectors):
+                start = time.perf_counter()
+                search(index, question, vector)
+                samples.append(time.perf_counter() - start)
+            results[f"retrieval_{name}"] = latency_summary(samples)
+    return results
+
+
+async def chat_latencies(client, questions, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def ask(question):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/chat/", headers={"X-Session-ID": SESSION}, json={"query": question}
+            )
+            response.raise_for_status()
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(question) for question in questions))
+    seconds = time.perf_counter() - start
+    return {**latency_summary(samples), "requests_per_s": round(len(questions) / seconds, 2)}
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench_rag_")
+    os.environ.update(
+        SESSION_DIR=os.path.join(workdir, "sessions"),
+        EMBEDDING_CACHE_DIR=os.path.join(workdir, "embedding_cache"),
+        INDEX_TYPE=args.index_type,
+        WARM_UP="0",
+    )
+    pdfs = [make_pdf(args.pages, seed=i) for i in range(args.documents)]
+    questions = make_questions(args.queries, seed=1)
+
+    with fake_openai_server(latency=args.embedding_latency, chat_latency=args.chat_latency, token_delay=0):
+        use_app("RAG")
+        os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "RAG"))
+        start = time.perf_counter()
+        import app
+
+        app.warm_up()
+        results = {"startup": {"warm_up_s": round(time.perf_counter() - start, 3)}}
+
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=300) as client:
+            seconds, chunks = await upload(client, pdfs)
+            pages = args.documents * args.pages
+            results["ingestion"] = {
+                "pages": pages,
+                "chunks": chunks,
+                "seconds": round(seconds, 3),
+                "pages_per_s": round(pages / seconds, 1),
+                "chunks_per_s": round(chunks / seconds, 1),
+            }
+            results.update(retrieval_latencies(app, questions))
+            results["chat"] = await chat_latencies(client, questions, args.concurrency)
+        results["memory"] = {"peak_rss_mb": peak_rss_mb()}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=40, help="pages per document")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent /chat/ requests")
+    parser.add_argument("--index-type", default="flat", choices=["flat", "ivf_flat", "hnsw", "ivf_pq"])
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="fake seconds per embedding request")
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="fake seconds per completion")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    finish(asyncio.run(run(args)), args)
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the OpenAI API, used to test and benchmark the tutorials
+without network calls or API costs. Serves embeddings and chat completions
+(plain and streamed). With FAKE_AGENT=1 the chat answers play the agent
+in Tutorials/AI_AGENT_TUT: one get_response_time action per domain in the
+question, then an Answer once the Action_Response arrives.
+
+Run with:
+    FAKE_LATENCY=0.2 FAKE_RPS=20 uvicorn fake_openai:app --port 8001
+
+and point the clients at http://localhost:8001/v1.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY = float(os.getenv("FAKE_LATENCY", "0.1"))  # seconds per request
+RPS = float(os.getenv("FAKE_RPS", "0"))  # requests per second before 429, 0 = unlimited
+DIM = int(os.getenv("FAKE_EMBEDDING_DIM", "256"))
+CHAT_LATENCY = float(os.getenv("FAKE_CHAT_LATENCY", "0.2"))  # seconds to the first token
+TOKEN_DELAY = float(os.getenv("FAKE_TOKEN_DELAY", "0.01"))  # seconds per further token
+ANSWER_TOKENS = int(os.getenv("FAKE_ANSWER_TOKENS", "40"))
+AGENT = os.getenv("FAKE_AGENT", "0") == "1"
+
+app = FastAPI()
+stats = {"requests": 0, "rate_limited": 0, "inputs": 0, "chat_requests": 0}
+_window = {"start": time.monotonic(), "count": 0}
+
+
+def fake_embedding(text, dim=DIM):
+    """Deterministic unit vector derived from the text."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _rate_limited():
+    if not RPS:
+        return False
+    now = time.monotonic()
+    if now - _window["start"] >= 1:
+        _window["start"], _window["count"] = now, 0
+    _window["count"] += 1
+    return _window["count"] > RPS
+
+
+def _too_many_requests():
+    stats["rate_limited"] += 1
+    return JSONResponse(
+        status_code=429,
+        headers={"retry-after": "1"},
+        content={"error": {"message": "Rate limit reached", "type": "requests"}},
+    )
+
+
+def fake_answer(messages, tokens=ANSWER_TOKENS):
+    """Deterministic answer tokens derived from the last message."""
+    last = (messages[-1].get("content") or "") if messages else ""
+    rng = random.Random(last)
+    words = [word for word in last.split() if word.isalpha()] or ["answer"]
+    return [rng.choice(words) + " " for _ in range(tokens)]
+
+
+def fake_agent_answer(messages):
+    """Tokens of a ReAct reply, see the module docstring."""
+    last = (messages[-1].get("content") or "") if messages else ""
+    if last.startswith("Action_Response"):
+        text = "Answer: " + last[len("Action_Response:"):].strip()
+    else:
+        domains = re.findall(r"\b[\w-]+(?:\.[\w-]+)*\.(?:com|org|net|io)\b", last)
+        actions = "\n".join(
+            json.dumps({"function_name": "get_response_time", "function_parms": {"url": domain}})
+            for domain in domains
+        )
+        if domains:
+            text = f"Thought: I should check the response times.\nAction:\n{actions}\nPAUSE"
+        else:
+            text = "Answer: nothing to check."
+    return re.findall(r"\s*\S+", text)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    if _rate_limited():
+        return _too_many_requests()
+
+    inputs = body["input"]
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    stats["inputs"] += len(inputs)
+    await asyncio.sleep(LATENCY)
+    return {
+        "object": "list",
+        "model": body.get("model", "fake"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": fake_embedding(text)}
+            for i, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    stats["chat_requests"] += 1
+    if _rate_limited():
+        return _too_many_requests()
+
+    tokens = fake_agent_answer(body["messages"]) if AGENT else fake_answer(body["messages"])
+    model = body.get("model", "fake")
+    created = int(time.time())
+    if not body.get("stream"):
+        await asyncio.sleep(CHAT_LATENCY + TOKEN_DELAY * (len(tokens) - 1))
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }
+
+    async def events():
+        await asyncio.sleep(CHAT_LATENCY)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(TOKEN_DELAY)
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
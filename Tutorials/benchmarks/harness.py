@@ -0,0 +1,125 @@
+"""
+Shared pieces of the app benchmarks: the fake OpenAI server, latency
+percentiles, peak memory and the JSON report with a regression check.
+"""
+import contextlib
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+TUTORIALS_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def fake_openai_server(**settings):
+    """
+    Runs fake_openai.py in a subprocess and points the OpenAI clients of
+    this process at it. `settings` become its FAKE_* environment, e.g.
+    latency=0.05 sets FAKE_LATENCY.
+    """
+    port = free_port()
+    env = dict(os.environ, **{f"FAKE_{key.upper()}": str(value) for key, value in settings.items()})
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fake_openai:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BENCHMARKS_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                urllib.request.urlopen(f"{base_url}/stats", timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        else:
+            raise RuntimeError("fake OpenAI server did not start")
+        os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def use_app(name):
+    """Makes the modules of Tutorials/<name> and Tutorials/common importable, as the app expects."""
+    sys.path.insert(0, os.path.join(TUTORIALS_DIR, name))
+    sys.path.append(os.path.join(TUTORIALS_DIR, "common"))
+
+
+def latency_summary(samples):
+    """p50/p95/p99 in milliseconds."""
+    samples = np.asarray(samples) * 1000
+    return {f"p{q}_ms": round(float(np.percentile(samples, q)), 3) for q in (50, 95, 99)}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def print_report(results):
+    for section, values in results.items():
+        if isinstance(values, dict):
+            print(f"{section}: " + ", ".join(f"{key}={value}" for key, value in values.items()))
+        else:
+            print(f"{section}: {values}")
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Metrics that got worse than `baseline` by more than `tolerance`
+    (a fraction). Throughputs (`*_per_s`) should not drop, everything
+    else (latencies, memory) should not grow.
+    """
+    found = []
+    for section, values in results.items():
+        if not isinstance(values, dict):
+            continue
+        for key, value in values.items():
+            old = baseline.get(section, {}).get(key)
+            if not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            if key.endswith("_per_s"):
+                change = -change
+            if change > tolerance:
+                found.append(f"{section}.{key}: {old} -> {value}")
+    return found
+
+
+def finish(results, args):
+    """Prints the results, writes --output and exits non-zero on regressions against --baseline."""
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+def add_report_arguments(parser):
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, as a fraction")
@@ -0,0 +1,76 @@
+"""
+Replays a long chat session through the HistoryManager of
+Tutorials/Langchain/history.py with a fake summarising LLM, and checks
+the cost and shape of the history it prepares.
+
+For each turn, the history prepared before it must end with the last
+turn verbatim, and over the whole session there must be at most one
+summary call per `step` turns. Reports summary calls, turns kept
+verbatim and history tokens, and exits with status 1 if a check fails.
+
+Run with:
+    python history_replay.py --turns 40 --turn-words 165
+"""
+import argparse
+import os
+import sys
+
+here = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(here, "..", "Langchain"))
+sys.path.insert(0, os.path.join(here, "..", "common"))
+from history import SUMMARY_LABEL, HistoryManager, _turn_tokens  # noqa: E402
+
+
+class FakeLLM:
+    """Counts calls and answers every prompt with a `words`-word summary."""
+
+    class Message:
+        def __init__(self, content):
+            self.content = content
+
+    def __init__(self, words):
+        self.words = words
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return self.Message(" ".join(["summary"] * self.words))
+
+
+def make_turn(i, words):
+    question = f"question {i} " + " ".join(["symptom"] * (words // 3))
+    answer = f"answer {i} " + " ".join(["precaution"] * (words - words // 3))
+    return question, answer
+
+
+def run(args):
+    llm = FakeLLM(args.summary_words)
+    manager = HistoryManager(llm, max_tokens=args.max_tokens, summary_words=args.summary_words, step=args.step)
+    turns, failures = [], []
+    print(f"{'turn':>5} {'calls':>6} {'verbatim':>9} {'tokens':>7}")
+    for i in range(args.turns):
+        history = manager.prepare(turns) if turns else []
+        verbatim = [turn for turn in history if turn[0] != SUMMARY_LABEL]
+        tokens = sum(_turn_tokens(turn) for turn in history)
+        print(f"{i:>5} {llm.calls:>6} {len(verbatim):>9} {tokens:>7}")
+        if turns and (not verbatim or verbatim[-1] != turns[-1]):
+            failures.append(f"turn {i}: last turn not kept verbatim")
+        turns.append(make_turn(i, args.turn_words))
+
+    allowed = args.turns // args.step
+    print(f"{llm.calls} summary calls for {args.turns} turns, at most {allowed} allowed")
+    if llm.calls > allowed:
+        failures.append(f"{llm.calls} summary calls, more than one per {args.step} turns")
+    for failure in failures:
+        print("FAIL", failure)
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--turn-words", type=int, default=165, help="words per question + answer")
+    parser.add_argument("--max-tokens", type=int, default=1500)
+    parser.add_argument("--summary-words", type=int, default=150)
+    parser.add_argument("--step", type=int, default=4)
+    sys.exit(0 if run(parser.parse_args()) else 1)
@@ -0,0 +1,104 @@
+"""
+Cold-start cost of the tutorial apps.
+
+For each app, imports it in a fresh interpreter several times and reports
+the import time. For the RAG app it also starts uvicorn and measures the
+time until /health first answers, and until it reports "ready" (the
+background warm-up has loaded the index and clients).
+
+Run with:
+    python import_time.py --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+TUTORIALS = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APPS = {
+    "RAG": os.path.join(TUTORIALS, "RAG"),
+    "Langchain": os.path.join(TUTORIALS, "Langchain"),
+}
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+
+
+def app_env():
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env.setdefault("PYTHONWARNINGS", "ignore")
+    return env
+
+
+def import_seconds(app_dir):
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=app_dir,
+        env=app_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_health(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+def health_seconds(timeout=60):
+    """Seconds from launching uvicorn until /health answers, and until ready."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=APPS["RAG"],
+        env=app_env(),
+    )
+    healthy = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            health = get_health(url)
+            if health is not None:
+                healthy = healthy or time.perf_counter() - start
+                if health.get("ready"):
+                    ready = time.perf_counter() - start
+                    break
+            time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait()
+    return healthy, ready
+
+
+def run(args):
+    print(f"{'app':<10} {'min s':>7} {'median s':>9} {'max s':>7}")
+    for name in args.apps:
+        samples = sorted(import_seconds(APPS[name]) for _ in range(args.runs))
+        print(f"{name:<10} {samples[0]:>7.3f} {samples[len(samples) // 2]:>9.3f} {samples[-1]:>7.3f}")
+
+    if "RAG" in args.apps:
+        healthy, ready = health_seconds()
+        fmt = lambda seconds: "timeout" if seconds is None else f"{seconds:.3f} s"
+        print(f"RAG /health first answered after {fmt(healthy)}, ready after {fmt(ready)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--apps", nargs="+", default=list(APPS), choices=list(APPS))
+    run(parser.parse_args())
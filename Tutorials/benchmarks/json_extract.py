@@ -0,0 +1,106 @@
+"""
+Speed of the JSON extractors in Tutorials/AI_AGENT_TUT/json_helpers.py on
+large adversarial agent responses.
+
+For each input kind and size, reports the time of extract_json_stream
+(single pass), the same scanner fed 4 characters at a time as from a
+token stream, extract_json (lazy regex + forward rescan) and
+extract_json_old, and how many objects each found. Doubling the size
+doubles the time of a linear extractor and quadruples a quadratic one.
+
+Run with:
+    python json_extract.py --sizes 1000 2000 4000 8000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "AI_AGENT_TUT"))
+from json_helpers import extract_json, extract_json_old, extract_json_stream, iter_json_objects  # noqa: E402
+
+
+def stream_tokens(text, size=4):
+    """The scanner fed `size` characters at a time, as from a token stream."""
+    return list(iter_json_objects(text[i:i + size] for i in range(0, len(text), size)))
+
+
+EXTRACTORS = {
+    "stream": extract_json_stream,
+    "stream_4_chars": stream_tokens,
+    "extract_json": extract_json,
+    "extract_json_old": extract_json_old,
+}
+
+
+def many_actions(n):
+    """n action objects with nested parameters, separated by prose."""
+    action = {"function_name": "get_response_time", "function_parms": {"url": "example.com"}}
+    return "Thought: checking.\n".join(f"Action: {json.dumps(action)}\nPAUSE\n" for _ in range(n))
+
+
+def unclosed_braces(n):
+    """Prose full of '{' that never close, then one action at the end."""
+    return "set {x " * n + json.dumps({"function_name": "f", "function_parms": {}})
+
+
+def braces_in_strings(n):
+    """One object whose string value is full of braces."""
+    return "Action: " + json.dumps({"function_name": "echo", "function_parms": {"text": "{}{" * n}})
+
+
+def deep_nesting(n):
+    """One object nested n levels deep."""
+    return "Answer: " + "{\"a\": " * n + "1" + "}" * n
+
+
+INPUTS = {
+    "many_actions": many_actions,
+    "unclosed_braces": unclosed_braces,
+    "braces_in_strings": braces_in_strings,
+    "deep_nesting": deep_nesting,
+}
+
+
+def timed(extract, text, budget):
+    """Best of a few runs, or None if one run exceeds `budget` seconds."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        result = extract(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > budget:
+            break
+    return best, len(result or [])
+
+
+def run(args):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * max(args.sizes) + 100))
+    print(f"{'input':<18} {'size':>6} {'chars':>9} " + " ".join(f"{name:>22}" for name in EXTRACTORS))
+    skipped = set()
+    for kind, make in INPUTS.items():
+        for size in args.sizes:
+            text = make(size)
+            cells = []
+            for name, extract in EXTRACTORS.items():
+                if (kind, name) in skipped:
+                    cells.append(f"{'skipped':>22}")
+                    continue
+                try:
+                    seconds, found = timed(extract, text, args.budget)
+                except RecursionError:
+                    cells.append(f"{'RecursionError':>22}")
+                    continue
+                if seconds > args.budget:
+                    skipped.add((kind, name))  # larger sizes would take even longer
+                cells.append(f"{seconds * 1000:>12.2f} ms {found:>5} obj")
+            print(f"{kind:<18} {size:>6} {len(text):>9} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000])
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds before an extractor is skipped")
+    run(parser.parse_args())
@@ -0,0 +1,114 @@
+"""
+Synthetic inputs for the benchmarks: text PDFs for the RAG app and disease
+CSVs in the layout of Tutorials/Langchain/Data. Everything is generated
+from a seed, so runs are comparable.
+"""
+import csv
+import os
+import random
+
+WORDS = (
+    "system model data index query vector search answer document page chunk "
+    "latency memory cache token budget network server client request batch "
+    "stream score rank filter embed retrieve summary report table figure "
+    "result method value error signal growth market energy water health"
+).split()
+
+LINES_PER_PAGE = 50
+LINE_WIDTH = 90
+
+
+def sentences(rng, count):
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 16))
+        yield " ".join(words).capitalize() + f" {rng.randint(1, 9999)}."
+
+
+def page_lines(rng, width=LINE_WIDTH, lines=LINES_PER_PAGE):
+    text = " ".join(sentences(rng, lines))
+    result, line = [], ""
+    for word in text.split():
+        if len(line) + len(word) + 1 > width:
+            result.append(line)
+            if len(result) == lines:
+                break
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return result
+
+
+def _pdf_string(text):
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def make_pdf(pages, seed=0):
+    """
+    A PDF with `pages` pages of random sentences, written directly (one
+    Helvetica text stream per page), so no PDF library is needed.
+    """
+    rng = random.Random(seed)
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_numbers = []
+    for _ in range(pages):
+        lines = page_lines(rng)
+        stream = "BT /F1 10 Tf 12 TL 40 760 Td " + " T* ".join(
+            f"{_pdf_string(line)} Tj" for line in lines
+        ) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_numbers.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_disease_csvs(directory, diseases=40, rows_per_disease=120, symptoms=130, seed=0):
+    """
+    Writes DiseaseAndSymptoms.csv and Diseaseprecaution.csv with the same
+    columns as the real data: up to 17 symptoms per row, 4 precautions per
+    disease. Returns the two paths.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    symptom_names = [f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}" for i in range(symptoms)]
+    disease_names = [f"Disease {rng.choice(WORDS).title()} {i}" for i in range(diseases)]
+
+    symptoms_path = os.path.join(directory, "DiseaseAndSymptoms.csv")
+    with open(symptoms_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Disease"] + [f"Symptom_{i}" for i in range(1, 18)])
+        for disease in disease_names:
+            typical = rng.sample(symptom_names, 10)
+            for _ in range(rows_per_disease):
+                row = rng.sample(typical, rng.randint(3, 10))
+                writer.writerow([disease] + [f" {symptom}" for symptom in row] + [""] * (17 - len(row)))
+
+    precautions_path = os.path.join(directory, "Diseaseprecaution.csv")
+    with open(precautions_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Disease"] + [f"Precaution_{i}" for i in range(1, 5)])
+        for disease in disease_names:
+            writer.writerow([disease] + [" ".join(rng.choices(WORDS, k=3)) for _ in range(4)])
+    return symptoms_path, precautions_path
+
+
+def make_questions(count, seed=0):
+    """Free-text questions over the synthetic vocabulary."""
+    rng = random.Random(seed)
+    return [f"What does the document say about {' '.join(rng.choices(WORDS, k=3))}?" for _ in range(count)]
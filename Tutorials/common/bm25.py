@@ -0,0 +1,138 @@
+import math
+import re
+from array import array
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens. Snake_case terms such as `nodal_skin_eruptions`
+    are kept whole and also split into their parts, so both the exact name
+    and plain words match.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index.
+
+    Postings are stored per term as two compact arrays (document numbers and
+    term frequencies) and scored with NumPy, so a query costs one vectorised
+    pass over the postings of its terms. Removed documents are masked out.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_ids = {}
+        self.postings_docs = []  # term id -> array('I') of document numbers
+        self.postings_tfs = []  # term id -> array('H') of term frequencies
+        self.doc_lengths = array("I")
+        self.alive = array("B")
+        self.keys = []  # document number -> key
+        self.numbers = {}  # key -> document number
+        self.total_length = 0
+        self.live_count = 0
+
+    def __len__(self):
+        return self.live_count
+
+    def add(self, key, text):
+        if key in self.numbers:
+            self.remove(key)
+        number = len(self.keys)
+        tokens = tokenize(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            term_id = self.term_ids.get(token)
+            if term_id is None:
+                term_id = self.term_ids[token] = len(self.postings_docs)
+                self.postings_docs.append(array("I"))
+                self.postings_tfs.append(array("H"))
+            self.postings_docs[term_id].append(number)
+            self.postings_tfs[term_id].append(min(count, 0xFFFF))
+        self.keys.append(key)
+        self.numbers[key] = number
+        self.doc_lengths.append(len(tokens))
+        self.alive.append(1)
+        self.total_length += len(tokens)
+        self.live_count += 1
+
+    def remove(self, key):
+        number = self.numbers.pop(key, None)
+        if number is None:
+            return False
+        self.alive[number] = 0
+        self.total_length -= self.doc_lengths[number]
+        self.live_count -= 1
+        return True
+
+    def search(self, query, k=10, allowed=None):
+        """
+        Returns up to k (key, score) pairs, best first.
+
+        `allowed` is an optional predicate on keys, applied to the top
+        candidates only.
+        """
+        if not self.live_count:
+            return []
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)
+        average_length = self.total_length / self.live_count
+        matched_docs, contributions = [], []
+        for token in set(tokenize(query)):
+            term_id = self.term_ids.get(token)
+            if term_id is None:
+                continue
+            docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+            tfs = np.frombuffer(self.postings_tfs[term_id], dtype=np.uint16).astype(np.float32)
+            # Postings of removed documents still count towards df; that only
+            # matters after many removals and keeps removal O(1).
+            idf = math.log(1 + (self.live_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[docs] / average_length)
+            matched_docs.append(docs)
+            contributions.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not matched_docs:
+            return []
+
+        # Sum per document over the matched postings only, not the corpus.
+        candidates, inverse = np.unique(np.concatenate(matched_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+        live = np.frombuffer(self.alive, dtype=np.uint8)[candidates].astype(bool)
+        candidates, scores = candidates[live], scores[live]
+        if allowed is None and len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            order = top[np.argsort(-scores[top])]
+        else:
+            order = np.argsort(-scores)
+
+        results = []
+        for i in order:
+            key = self.keys[candidates[i]]
+            if allowed is None or allowed(key):
+                results.append((key, float(scores[i])))
+                if len(results) == k:
+                    break
+        return results
+
+
+def reciprocal_rank_fusion(result_lists, k=60):
+    """
+    Merges ranked lists of keys: each key scores sum(1 / (k + rank)) over
+    the lists it appears in. Returns the keys, best first.
+    """
+    scores = {}
+    for results in result_lists:
+        for rank, key in enumerate(results):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
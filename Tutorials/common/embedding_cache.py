@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite allows at most 999 parameters per statement in older versions.
+MAX_PARAMS = 900
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache, safe to share between processes.
+
+    Vectors are stored as float32 blobs in an SQLite database
+    (`embeddings.sqlite3`) with the time each was last used. SQLite's
+    locking keeps several workers on the same directory consistent, and a
+    write only touches the entries it stores. When more than `max_entries`
+    are stored the least recently used ones are deleted.
+    """
+
+    def __init__(self, directory, max_entries=200_000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.path = os.path.join(directory, "embeddings.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # One connection per cache; the lock keeps this process's threads
+        # off it at the same time, SQLite keeps other processes out.
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings"
+            " (key TEXT PRIMARY KEY, vector BLOB NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys):
+        """Returns {key: vector} for the keys that are cached."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(keys), MAX_PARAMS):
+                batch = keys[start:start + MAX_PARAMS]
+                marks = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                if rows:
+                    hit = [key for key, _ in rows]
+                    self._db.execute(
+                        f"UPDATE embeddings SET used = ? WHERE key IN ({','.join('?' * len(hit))})",
+                        [time.time(), *hit],
+                    )
+        return found
+
+    def put_many(self, keys, vectors):
+        """Stores vectors, evicting least recently used entries if full."""
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                    [(key, vector.tobytes(), now) for key, vector in zip(keys, vectors)],
+                )
+                excess = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN"
+                        " (SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                        (excess,),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model so chunks that were embedded before, with the
+    same model, are read from an EmbeddingCache instead of the API.
+    """
+
+    def __init__(self, embeddings, cache, model_name=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text):
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it occurs several times.
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(list(missing), vectors)
+            found.update(zip(missing, (list(map(float, v)) for v in vectors)))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text):
+        return await self.embeddings.aembed_query(text)
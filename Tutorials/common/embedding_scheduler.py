@@ -0,0 +1,243 @@
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from functools import lru_cache
+
+from langchain_core.embeddings import Embeddings
+from openai import AsyncOpenAI
+
+
+@lru_cache(maxsize=None)
+def _get_encoding():
+    # tiktoken is optional and downloads its encoding on first use, so any
+    # failure falls back to ~4 characters per token.
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Async token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0:
+                    self._refill()
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    wait = (amount - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    async def charge(self, amount=1):
+        """
+        Takes `amount` tokens without queueing behind `acquire` callers,
+        going into debt if the bucket is short; callers of `acquire` then wait
+        for the debt to refill. Still waits out a pause.
+        """
+        wait = self.paused_until - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._refill()
+        self.tokens -= amount
+
+    def pause(self, seconds):
+        """Stops handing out tokens for `seconds`, e.g. after a 429."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _is_rate_limited(exc):
+    return getattr(exc, "status_code", None) == 429
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class EmbeddingScheduler:
+    """
+    Embeds many texts with as few, and as concurrent, requests as allowed.
+
+    Texts are grouped into batches of at most `max_batch_tokens` tokens and
+    `max_batch_size` inputs, up to `max_concurrency` batches are in flight at
+    once, and token buckets keep requests under the per-minute limits. A 429
+    pauses all batches and the batch is retried with exponential backoff.
+    The limits hold across all concurrent `aembed` calls, which must run on
+    one event loop.
+
+    Args:
+        embed_batch: Async callable taking a list of texts and returning
+                     their vectors.
+    """
+
+    def __init__(
+        self,
+        embed_batch,
+        max_batch_tokens=8000,
+        max_batch_size=512,
+        max_concurrency=4,
+        requests_per_minute=3000,
+        tokens_per_minute=1_000_000,
+        max_retries=6,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(requests_per_minute / 60)
+        self._tokens = TokenBucket(tokens_per_minute / 60)
+
+    def make_batches(self, texts):
+        """Groups text indexes into batches that fit the token budget."""
+        batches, batch, batch_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append((batch, batch_tokens))
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += tokens
+        if batch:
+            batches.append((batch, batch_tokens))
+        return batches
+
+    async def aembed(self, texts, priority=False):
+        """
+        Returns the vectors of `texts`, in order.
+
+        `priority` batches (e.g. a user's query) skip the concurrency limit and
+        the bucket queue, so they don't wait behind bulk uploads; they are
+        still charged to the buckets, which delays the bulk batches instead.
+        """
+        vectors = [None] * len(texts)
+        requests, tokens = self._requests, self._tokens
+
+        async def take(batch_tokens):
+            if priority:
+                await requests.charge()
+                await tokens.charge(batch_tokens)
+            else:
+                await requests.acquire()
+                await tokens.acquire(batch_tokens)
+
+        async def run(batch, batch_tokens):
+            async with contextlib.nullcontext() if priority else self._semaphore:
+                for attempt in range(self.max_retries + 1):
+                    await take(batch_tokens)
+                    try:
+                        result = await self.embed_batch([texts[i] for i in batch])
+                        break
+                    except Exception as e:
+                        if not _is_rate_limited(e) or attempt == self.max_retries:
+                            raise
+                        delay = _retry_after(e) or min(60, 2 ** attempt) * random.uniform(0.5, 1)
+                        requests.pause(delay)
+                        tokens.pause(delay)
+            for i, vector in zip(batch, result):
+                vectors[i] = vector
+
+        await asyncio.gather(*(run(*batch) for batch in self.make_batches(texts)))
+        return vectors
+
+
+class ScheduledEmbeddings(Embeddings):
+    """
+    OpenAI embeddings that go through an EmbeddingScheduler.
+
+    Every call, sync or async and from any thread, runs on one event loop
+    thread owned by the instance, started on first use. So all of them
+    share one pooled client and one scheduler, and the rate limits hold
+    across concurrent uploads and queries. Queries are scheduled with
+    priority, so a chat request doesn't wait behind an upload's batches.
+
+    `base_url` can point at any OpenAI compatible server, such as the fake
+    server in Tutorials/benchmarks/fake_openai.py.
+    """
+
+    def __init__(self, model="text-embedding-ada-002", api_key=None, base_url=None, **scheduler_kwargs):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.scheduler_kwargs = scheduler_kwargs
+        self._loop = None
+        self._client = None
+        self._scheduler = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                # The scheduler does its own retrying, so the client must not.
+                self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+                self._scheduler = EmbeddingScheduler(self._embed_batch, **self.scheduler_kwargs)
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="embeddings", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _embed_batch(self, batch):
+        response = await self._client.embeddings.create(model=self.model, input=batch)
+        return [item.embedding for item in response.data]
+
+    def _submit(self, texts, priority=False):
+        loop = self._get_loop()
+        return asyncio.run_coroutine_threadsafe(self._scheduler.aembed(texts, priority), loop)
+
+    async def aembed_documents(self, texts):
+        return await asyncio.wrap_future(self._submit(texts))
+
+    async def aembed_query(self, text):
+        return (await asyncio.wrap_future(self._submit([text], priority=True)))[0]
+
+    def embed_documents(self, texts):
+        return self._submit(texts).result()
+
+    def embed_query(self, text):
+        return self._submit([text], priority=True).result()[0]
+
+    def close(self):
+        """Closes the client and stops the event loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
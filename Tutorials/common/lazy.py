@@ -0,0 +1,24 @@
+import functools
+import threading
+
+
+def lazy(factory):
+    """
+    Turns a zero-argument factory into a getter that builds its object on
+    first use. Threads asking at the same time wait for the single build
+    instead of building their own. `getter.initialized()` reports whether
+    the object exists yet, without building it.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(factory)
+    def getter():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(factory())
+        return built[0]
+
+    getter.initialized = lambda: bool(built)
+    return getter
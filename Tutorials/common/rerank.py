@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+
+from bm25 import tokenize
+
+
+def lexical_scores(query, texts):
+    """
+    Share of the query's terms found in each text, weighted by how rare the
+    term is among `texts`, in [0, 1].
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms or not texts:
+        return np.zeros(len(texts), dtype=np.float32)
+    contains = np.array(
+        [[term in tokens for term in terms] for tokens in map(set, map(tokenize, texts))],
+        dtype=np.float32,
+    )
+    df = contains.sum(axis=0)
+    idf = np.log1p(len(texts) / np.maximum(df, 1)).astype(np.float32)
+    return contains @ idf / idf.sum()
+
+
+def rerank(query_vector, candidate_vectors, k=3, lexical=None, lexical_weight=0.3, diversity=0.3):
+    """
+    Picks the k best candidates by maximal marginal relevance.
+
+    Relevance is the cosine similarity to the query, blended with the
+    `lexical` scores (e.g. from lexical_scores) by `lexical_weight`. Each
+    pick then trades relevance against similarity to the candidates already
+    picked, by `diversity`, so near-duplicate chunks don't fill the prompt.
+
+    Args:
+        query_vector (list[float]): Embedded query.
+        candidate_vectors (np.ndarray): Candidate embeddings, shape (n, dim).
+        k (int): Number of candidates to return.
+        lexical (np.ndarray): Optional per-candidate scores in [0, 1].
+
+    Returns:
+        list[int]: Positions of the chosen candidates, best first.
+    """
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    if len(vectors) == 0:
+        return []
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    if lexical is not None:
+        relevance = (1 - lexical_weight) * relevance + lexical_weight * np.asarray(lexical)
+
+    chosen = []
+    redundancy = np.full(len(vectors), -math.inf, dtype=np.float32)  # max similarity to a pick
+    scores = relevance.copy()
+    for _ in range(min(k, len(vectors))):
+        best = int(np.argmax(scores))
+        chosen.append(best)
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+        scores = (1 - diversity) * relevance - diversity * redundancy
+        scores[chosen] = -math.inf
+    return chosen